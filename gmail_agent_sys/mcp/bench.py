@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""End-to-end benchmark for the snapshot, apply, trash and archive modes.
+
+Each corpus size gets a fresh local Gmail stand-in (see fake_gmail.py); every
+mode runs in its own spawned process so peak RSS is per mode. Results are
+written as JSON and can be checked against a previous run:
+
+    python3 -m gmail_agent_sys.mcp.bench --sizes 1000,10000 --output .tokens/bench.json
+    python3 -m gmail_agent_sys.mcp.bench --baseline .tokens/bench.json --max-regression 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from gmail_agent_sys.mcp import entrypoint
+from gmail_agent_sys.mcp.fake_gmail import build_server
+
+
+BENCH_MODES = ["build_snapshot", "apply_snapshot", "trash_commit", "archive_migrate"]
+BENCH_SIZES_DEFAULT = "1000,10000,100000"
+TRASH_TAG_SHARE = 0.1
+REGRESSION_METRICS = ["wall_seconds", "calls_per_message", "peak_rss_kb"]
+
+
+def _peak_rss_kb() -> int:
+    # ru_maxrss survives fork+exec on Linux, so the spawned worker would report the
+    # parent's (corpus-holding) peak; VmHWM is reset with the new address space.
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text(encoding="utf-8").splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes.
+    return int(peak / 1024) if sys.platform == "darwin" else int(peak)
+
+
+def _run_mode(mode: str, workdir: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    work = Path(workdir)
+    label_file = entrypoint.CONFIG_DIR / "labels.v3.json"
+    filter_file = entrypoint.CONFIG_DIR / "filters.v3.json"
+    concurrency = params["concurrency"]
+    # Measure concurrency N from the first call: open the AIMD window at N rather than
+    # main()'s half-window start. AIMD still shrinks it on congestion.
+    entrypoint._GMAIL_CONCURRENCY.ensure(concurrency)
+    if mode == "build_snapshot":
+        result = entrypoint._run_build_snapshot(
+            label_file=label_file,
+            filter_file=filter_file,
+            snapshot_limit=params["snapshot_limit"],
+            snapshot_hours=params["snapshot_hours"],
+            allow_critical=False,
+            allow_self_sent_manual=False,
+            snapshot_file=work / "snapshot.json",
+            concurrency=concurrency,
+        )
+        processed = result["selected_candidates"] + len(result["protected_skips"]) + len(result["self_sent_skips"])
+    elif mode == "apply_snapshot":
+        result = entrypoint._run_apply_snapshot(
+            snapshot_file=work / "snapshot.json",
+            approval_text=entrypoint.PHASE10_APPLY_APPROVAL_TEXT,
+            run_id="bench-apply",
+            journal_file=work / "apply_journal.jsonl",
+            concurrency=concurrency,
+        )
+        processed = result.get("selected_candidates", 0)
+    elif mode == "trash_commit":
+        result = entrypoint._run_trash_commit(
+            trash_label="@AUTO/TrashCandidate",
+            older_than_days=params["trash_older_than_days"],
+            trash_limit=params["trash_limit"],
+            approval_text=entrypoint.PHASE10_TRASH_APPROVAL_TEXT,
+            run_id="bench-trash",
+            journal_file=work / "trash_journal.jsonl",
+            concurrency=concurrency,
+        )
+        processed = result.get("trashed", 0) + len(result.get("failures", []))
+    elif mode == "archive_migrate":
+        result = entrypoint._run_archive_migrate(
+            label_file=label_file,
+            filter_file=filter_file,
+            archive_root=entrypoint.ARCHIVE_ROOT_DEFAULT,
+            migration_scope="legacy-user",
+            batch_size=params["archive_batch_size"],
+            max_messages=None,
+            checkpoint_file=work / "archive_checkpoint.json",
+            journal_file=work / "archive_journal.jsonl",
+            run_id="bench-archive",
+            approval_text=entrypoint.PHASE9_APPROVAL_TEXT,
+            concurrency=concurrency,
+        )
+        processed = result.get("messages_scanned", 0)
+    else:
+        raise ValueError(f"unknown bench mode: {mode}")
+    return {"status": result.get("status"), "messages": int(processed or 0)}
+
+
+def _mode_worker(mode: str, workdir: str, params: Dict[str, Any], conn: Any) -> None:
+    started = time.perf_counter()
+    try:
+        outcome = _run_mode(mode, workdir, params)
+    except Exception as exc:
+        outcome = {"status": "fail", "messages": 0, "error": str(exc)[:400]}
+    outcome["wall_seconds"] = round(time.perf_counter() - started, 4)
+    outcome["peak_rss_kb"] = _peak_rss_kb()
+    conn.send(outcome)
+    conn.close()
+
+
+def _tag_trash_candidates(mailbox: Any, older_than_days: int, share: float) -> int:
+    label_id = mailbox.ensure_label("@AUTO/TrashCandidate")
+    cutoff_ms = int((time.time() - older_than_days * 86400) * 1000)
+    old_ids = sorted(mid for mid, m in mailbox.messages.items() if m["internalDate"] < cutoff_ms)
+    step = max(1, int(round(1 / share))) if share > 0 else 0
+    tagged = old_ids[::step] if step else []
+    for mid in tagged:
+        mailbox.messages[mid]["labelIds"].add(label_id)
+    return len(tagged)
+
+
+def _api_totals(stats: Dict[str, int]) -> Dict[str, int]:
+    return {
+        "api_calls": sum(v for k, v in stats.items() if k.startswith("calls:")),
+        "http_requests": stats.get("http_requests", 0),
+        "quota_units": stats.get("units_total", 0),
+        "api_errors": sum(v for k, v in stats.items() if k.startswith("errors:")),
+        "bytes_out": stats.get("bytes_out", 0),
+    }
+
+
+def run_benchmark(
+    sizes: List[int],
+    modes: List[str],
+    params: Dict[str, Any],
+    latency_ms: float = 0.0,
+    seed: int = 7,
+) -> List[Dict[str, Any]]:
+    ctx = multiprocessing.get_context("spawn")
+    results: List[Dict[str, Any]] = []
+    for size in sizes:
+        seed_started = time.perf_counter()
+        server = build_server(messages=size, seed=seed, latency_ms={"default": latency_ms} if latency_ms else None)
+        tagged = _tag_trash_candidates(server.app.mailbox, params["trash_older_than_days"], TRASH_TAG_SHARE)
+        seed_seconds = round(time.perf_counter() - seed_started, 3)
+        size_params = dict(params, trash_limit=params["trash_limit"] or tagged)
+        with server, tempfile.TemporaryDirectory(prefix="gmail-bench-") as workdir:
+            token_file = Path(workdir) / "token.json"
+            token_file.write_text(json.dumps({"access_token": "bench"}), encoding="utf-8")
+            os.environ.update(
+                {
+                    "GMAIL_API_BASE": server.api_base,
+                    "GMAIL_TOKEN_FILE": str(token_file),
+                    "GMAIL_CLIENT_SECRET_PATH": str(token_file),
+                    "GMAIL_TOKEN_CACHE": str(Path(workdir) / "token_cache.json"),
+                    "GMAIL_TOKEN_STORE": workdir,
+                    "GMAIL_DEAD_LETTER_FILE": str(Path(workdir) / "dead_letter.jsonl"),
+                    "GMAIL_QUOTA_UNITS_PER_SECOND": str(params["client_quota_units_per_second"]),
+                }
+            )
+            for mode in modes:
+                with server.app.faults.lock:
+                    server.app.faults.stats.clear()
+                parent_conn, child_conn = ctx.Pipe(duplex=False)
+                proc = ctx.Process(target=_mode_worker, args=(mode, workdir, size_params, child_conn))
+                proc.start()
+                child_conn.close()
+                outcome = parent_conn.recv() if parent_conn.poll(params["timeout_seconds"]) else {
+                    "status": "fail",
+                    "messages": 0,
+                    "error": "timeout",
+                    "wall_seconds": params["timeout_seconds"],
+                    "peak_rss_kb": 0,
+                }
+                proc.join(timeout=5)
+                if proc.is_alive():
+                    proc.kill()
+                with server.app.faults.lock:
+                    stats = dict(server.app.faults.stats)
+                totals = _api_totals(stats)
+                messages = outcome["messages"]
+                row = {
+                    "size": size,
+                    "mode": mode,
+                    **outcome,
+                    **totals,
+                    "calls_per_message": round(totals["api_calls"] / messages, 4) if messages else None,
+                    "throughput_msgs_per_sec": round(messages / outcome["wall_seconds"], 2) if outcome["wall_seconds"] else None,
+                    "seed_seconds": seed_seconds,
+                }
+                results.append(row)
+                print(json.dumps(row, ensure_ascii=False), file=sys.stderr, flush=True)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=entrypoint.REPO_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare_results(
+    current: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    max_regression: float,
+) -> List[Dict[str, Any]]:
+    base_rows = {(row["size"], row["mode"]): row for row in baseline}
+    regressions = []
+    for row in current:
+        base = base_rows.get((row["size"], row["mode"]))
+        if not base:
+            continue
+        for metric in REGRESSION_METRICS:
+            now_value, base_value = row.get(metric), base.get(metric)
+            if not isinstance(now_value, (int, float)) or not isinstance(base_value, (int, float)) or base_value <= 0:
+                continue
+            ratio = now_value / base_value - 1.0
+            if ratio > max_regression:
+                regressions.append(
+                    {
+                        "size": row["size"],
+                        "mode": row["mode"],
+                        "metric": metric,
+                        "baseline": base_value,
+                        "current": now_value,
+                        "change": round(ratio, 4),
+                    }
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="benchmark snapshot/apply/trash/archive modes against a local Gmail stand-in")
+    parser.add_argument("--sizes", default=BENCH_SIZES_DEFAULT, help="comma separated corpus sizes")
+    parser.add_argument("--modes", default=",".join(BENCH_MODES), help="comma separated subset of modes")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fake per-call latency")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--snapshot-limit", type=int, default=200)
+    parser.add_argument("--snapshot-hours", type=int, default=24 * 60)
+    parser.add_argument("--trash-older-than-days", type=int, default=14)
+    parser.add_argument("--trash-limit", type=int, default=0, help="0 = every tagged TrashCandidate")
+    parser.add_argument("--archive-batch-size", type=int, default=200)
+    parser.add_argument(
+        "--client-quota-units-per-second",
+        type=float,
+        default=1_000_000,
+        help="client-side quota limiter rate (the real default would dominate timings)",
+    )
+    parser.add_argument("--timeout-seconds", type=float, default=1800)
+    parser.add_argument("--output", type=str, default="", help="write JSON results here")
+    parser.add_argument("--baseline", type=str, default="", help="previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    modes = entrypoint._parse_csv_arg(args.modes)
+    unknown = [m for m in modes if m not in BENCH_MODES]
+    if unknown:
+        raise SystemExit(f"unknown bench modes: {', '.join(unknown)}")
+    sizes = [int(s) for s in entrypoint._parse_csv_arg(args.sizes)]
+    params = {
+        "concurrency": max(1, args.concurrency),
+        "snapshot_limit": args.snapshot_limit,
+        "snapshot_hours": args.snapshot_hours,
+        "trash_older_than_days": args.trash_older_than_days,
+        "trash_limit": args.trash_limit,
+        "archive_batch_size": args.archive_batch_size,
+        "client_quota_units_per_second": args.client_quota_units_per_second,
+        "timeout_seconds": args.timeout_seconds,
+    }
+    results = run_benchmark(sizes, modes, params, latency_ms=args.latency_ms, seed=args.seed)
+    payload: Dict[str, Any] = {
+        "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {**params, "sizes": sizes, "modes": modes, "latency_ms": args.latency_ms, "seed": args.seed},
+        "results": results,
+    }
+    status = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_results(results, baseline.get("results", []), args.max_regression)
+        payload["baseline"] = {"path": args.baseline, "git_commit": baseline.get("git_commit"), "regressions": regressions}
+        status = 1 if regressions else 0
+    if any(row.get("status") == "fail" for row in results):
+        status = 1
+    if args.output:
+        entrypoint._write_json_artifact(Path(args.output), payload)
+    print(json.dumps(payload, ensure_ascii=False, indent=2))
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
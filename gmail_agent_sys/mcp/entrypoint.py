@@ -8,32 +8,40 @@ It validates policy artifacts and can run offline matcher simulations.
 from __future__ import annotations
 
 import argparse
+import atexit
 import contextlib
+import gzip
+import http.client
 import json
 import os
+import random
 import re
+import select
+import sqlite3
 import sys
 import hashlib
 import math
-from collections import defaultdict, Counter
-from email.utils import parseaddr
+import time
+from collections import defaultdict, deque, Counter, OrderedDict
+from email.utils import parseaddr, parsedate_to_datetime
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 import secrets
 import threading
 import webbrowser
-from functools import cmp_to_key
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import cmp_to_key, partial
 from urllib.error import HTTPError, URLError
 from urllib.parse import parse_qs, urlencode, urlparse, quote
 from urllib.request import Request, urlopen
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 
 ROOT = Path(__file__).resolve().parents[2]
 CONFIG_DIR = ROOT / "config"
 REPO_ROOT = ROOT
-GMAIL_API_BASE = "https://gmail.googleapis.com/gmail/v1/users/me"
+GMAIL_API_BASE = os.getenv("GMAIL_API_BASE", "https://gmail.googleapis.com/gmail/v1/users/me").rstrip("/")
 PHASE7B_APPROVAL_TEXT = (
     "Phase 7-b 실제 mutate 파일럿(최대 10건)을 승인합니다. 이상 징후 발생 시 즉시 중단하고 롤백 절차를 수행합니다."
 )
@@ -47,6 +55,51 @@ PHASE9_APPROVAL_TEXT = "Phase 9 Legacy 라벨 일괄 아카이브(Shadow Archive
 ARCHIVE_ROOT_DEFAULT = "#Archive/Legacy-20260305"
 ARCHIVE_STAGES = ["A", "B", "C"]
 GMAIL_REQUEST_TIMEOUT_SECONDS = max(5, int(os.getenv("GMAIL_REQUEST_TIMEOUT", "60")))
+GMAIL_POOL_MAX_IDLE_PER_HOST = max(1, int(os.getenv("GMAIL_POOL_MAX_IDLE", "8")))
+GMAIL_POOL_IDLE_TIMEOUT_SECONDS = max(1, int(os.getenv("GMAIL_POOL_IDLE_TIMEOUT", "50")))
+GMAIL_BATCH_MAX_PARTS = 100
+GMAIL_BATCH_MODIFY_MAX_IDS = 1000
+MCP_SERVER_CONFIG_PATH = CONFIG_DIR / "mcp.server.json"
+GMAIL_QUOTA_UNITS_PER_SECOND_DEFAULT = 250
+GMAIL_RETRY_POLICY_DEFAULT = {
+    "max_attempts": 5,
+    "base_delay_ms": 800,
+    "max_delay_ms": 8000,
+    "jitter": 0.15,
+    "retry_status_codes": [429, 500, 502, 503, 504],
+}
+GMAIL_RETRY_AFTER_MAX_SECONDS = 120
+# POSTs that leave the same state when repeated; anything else is only retried on 429,
+# which Gmail returns before doing the work.
+GMAIL_IDEMPOTENT_POST_ENDPOINTS = {"messages.modify", "messages.batchModify", "messages.trash", "messages.untrash"}
+# Partial-response masks: only request the fields the callers actually read.
+GMAIL_LABELS_FIELDS = "labels(id,name,type)"
+GMAIL_LIST_FIELDS = "messages/id,nextPageToken"
+GMAIL_METADATA_FIELDS = "id,threadId,labelIds,internalDate,historyId,payload/headers"
+GMAIL_MUTATE_FIELDS = "id"
+GMAIL_PROFILE_FIELDS = "emailAddress,historyId,messagesTotal"
+GMAIL_HISTORY_FIELDS = (
+    "history(messagesAdded/message(id,labelIds),messagesDeleted/message/id,"
+    "labelsAdded(message/id,labelIds),labelsRemoved(message/id,labelIds)),historyId,nextPageToken"
+)
+GMAIL_HISTORY_TYPES = ["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"]
+GMAIL_MIRROR_TTL_SECONDS_DEFAULT = 6 * 3600
+GMAIL_LABEL_CACHE_TTL_SECONDS_DEFAULT = 15 * 60
+DRY_RUN_STREAM_BATCH = 1000
+GMAIL_QUERY_MAX_CHARS = 1500
+# Gmail API per-method quota-unit costs (bucket, units).
+GMAIL_QUOTA_UNIT_COSTS = {
+    "labels.list": ("read", 1),
+    "labels.create": ("write", 5),
+    "messages.list": ("read", 5),
+    "messages.get": ("read", 5),
+    "messages.modify": ("write", 5),
+    "messages.batchModify": ("write", 50),
+    "messages.trash": ("write", 5),
+    "messages.untrash": ("write", 5),
+    "history.list": ("read", 2),
+    "profile.get": ("read", 1),
+}
 KNOWN_GMAIL_SYSTEM_LABELS = {
     "INBOX",
     "UNREAD",
@@ -238,7 +291,7 @@ def _exchange_auth_code_for_tokens(
 
 def _gmail_me_profile(access_token: str) -> Dict[str, Any]:
     req = Request(
-        "https://gmail.googleapis.com/gmail/v1/users/me/profile",
+        f"{GMAIL_API_BASE}/profile?fields=emailAddress,messagesTotal,threadsTotal",
         headers={"Authorization": f"Bearer {access_token}"},
     )
     try:
@@ -361,9 +414,9 @@ def _load_token_artifact(token_file: Path) -> Dict[str, Any]:
 
 def _write_token_artifact(token_file: Path, token_data: Dict[str, Any]) -> None:
     token_file.parent.mkdir(parents=True, exist_ok=True)
-    token_file.write_text(
-        json.dumps(token_data, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    tmp_path = token_file.with_name(f".{token_file.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(token_data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, token_file)
 
 
 def _token_expired(token_data: Dict[str, Any]) -> bool:
@@ -420,6 +473,669 @@ def _refresh_access_token(token_data: Dict[str, Any]) -> Dict[str, Any]:
     return token_data
 
 
+class _TokenManager:
+    # Shared access token for one token file: proactive refresh before expiry, one
+    # in-flight refresh for all threads, and atomic persistence only on change.
+    def __init__(self, token_file: Optional[Path], token_data: Dict[str, Any]):
+        self.token_file = token_file
+        self.token_data = token_data
+        self._cond = threading.Condition()
+        self._refreshing = False
+        self._refresh_error: Optional[BaseException] = None
+        self._persisted = self._fingerprint()
+
+    def _fingerprint(self) -> str:
+        return json.dumps(self.token_data, sort_keys=True, ensure_ascii=False)
+
+    def current(self) -> Dict[str, Any]:
+        if _token_expired(self.token_data):
+            self.refresh(stale_access_token=self.token_data.get("access_token"))
+        return self.token_data
+
+    def access_token(self) -> str:
+        return str(self.current()["access_token"])
+
+    def refresh(self, stale_access_token: Optional[str] = None) -> Dict[str, Any]:
+        with self._cond:
+            if self._refreshing:
+                while self._refreshing:
+                    self._cond.wait()
+                if self._refresh_error is not None:
+                    raise self._refresh_error
+                return self.token_data
+            if stale_access_token is not None and self.token_data.get("access_token") != stale_access_token:
+                return self.token_data
+            self._refreshing = True
+            self._refresh_error = None
+        started = time.monotonic()
+        try:
+            refreshed = _refresh_access_token(dict(self.token_data))
+        except BaseException as exc:
+            with self._cond:
+                self._refreshing = False
+                self._refresh_error = exc
+                self._cond.notify_all()
+            raise
+        _GMAIL_METRICS.observe("oauth.refresh", time.monotonic() - started, 0, 0, 200)
+        with self._cond:
+            self.token_data.update(refreshed)
+            self._refreshing = False
+            self._cond.notify_all()
+        self.persist()
+        return self.token_data
+
+    def persist(self) -> bool:
+        with self._cond:
+            fingerprint = self._fingerprint()
+            if self.token_file is None or fingerprint == self._persisted:
+                return False
+            _write_token_artifact(self.token_file, self.token_data)
+            self._persisted = fingerprint
+            return True
+
+
+_TOKEN_MANAGERS: Dict[Any, _TokenManager] = {}
+_TOKEN_MANAGERS_LOCK = threading.Lock()
+
+
+def _token_manager(token_file: Path) -> _TokenManager:
+    key = str(token_file.resolve())
+    with _TOKEN_MANAGERS_LOCK:
+        manager = _TOKEN_MANAGERS.get(key)
+        if manager is None:
+            manager = _TokenManager(token_file, _load_token_artifact(token_file))
+            _TOKEN_MANAGERS[key] = manager
+            _TOKEN_MANAGERS[id(manager.token_data)] = manager
+        return manager
+
+
+def _token_manager_for(token_data: Dict[str, Any]) -> _TokenManager:
+    with _TOKEN_MANAGERS_LOCK:
+        manager = _TOKEN_MANAGERS.get(id(token_data))
+        if manager is None or manager.token_data is not token_data:
+            manager = _TokenManager(None, token_data)
+            _TOKEN_MANAGERS[id(token_data)] = manager
+        return manager
+
+
+class _GmailConnectionPool:
+    # Keep-alive HTTP(S) connections keyed by (scheme, host, port), shared across threads.
+    _RESET_ERRORS = (
+        http.client.RemoteDisconnected,
+        http.client.BadStatusLine,
+        ConnectionResetError,
+        ConnectionAbortedError,
+        BrokenPipeError,
+    )
+
+    def __init__(self, max_idle_per_host: int, idle_timeout_seconds: float, timeout_seconds: float):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.timeout_seconds = timeout_seconds
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[http.client.HTTPConnection, float]]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _new_connection(self, key: Tuple[str, str, int]) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        self._count("connections_opened")
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout_seconds)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout_seconds)
+
+    def _healthy(self, conn: http.client.HTTPConnection, idle_since: float) -> bool:
+        if conn.sock is None:
+            return False
+        if time.monotonic() - idle_since > self.idle_timeout_seconds:
+            return False
+        try:
+            # An idle keep-alive socket is only readable when the server closed it (EOF) or sent junk.
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def _acquire(self, key: Tuple[str, str, int]) -> Tuple[http.client.HTTPConnection, bool]:
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                item = idle.pop() if idle else None
+            if item is None:
+                return self._new_connection(key), False
+            conn, idle_since = item
+            if self._healthy(conn, idle_since):
+                self._count("connections_reused")
+                return conn, True
+            self._count("connections_discarded")
+            conn.close()
+
+    def _release(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.max_idle_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        data: Optional[bytes] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        parsed = urlparse(url)
+        scheme = parsed.scheme or "https"
+        key = (scheme, parsed.hostname or "", parsed.port or (443 if scheme == "https" else 80))
+        target = parsed.path or "/"
+        if parsed.query:
+            target = f"{target}?{parsed.query}"
+
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                conn.request(method, target, body=data, headers=headers)
+                resp = conn.getresponse()
+                raw = resp.read()
+            except self._RESET_ERRORS:
+                conn.close()
+                if reused:
+                    # Server dropped a pooled connection between requests; retry on a fresh one.
+                    self._count("reconnects")
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            response_headers = {k.lower(): v for k, v in resp.getheaders()}
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            return resp.status, response_headers, raw
+
+    def report(self) -> Dict[str, int]:
+        with self._lock:
+            result = dict(sorted(self.stats.items()))
+            self.stats = Counter()
+            return result
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle = [conn for items in self._idle.values() for conn, _ in items]
+            self._idle.clear()
+        for conn in idle:
+            conn.close()
+
+
+_GMAIL_POOL = _GmailConnectionPool(
+    max_idle_per_host=GMAIL_POOL_MAX_IDLE_PER_HOST,
+    idle_timeout_seconds=GMAIL_POOL_IDLE_TIMEOUT_SECONDS,
+    timeout_seconds=GMAIL_REQUEST_TIMEOUT_SECONDS,
+)
+atexit.register(_GMAIL_POOL.close_all)
+
+
+class _TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate_per_second = max(0.001, float(rate_per_second))
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, units: float) -> float:
+        # Take the units now (possibly into debt) and return how long the caller must wait.
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+            self.updated_at = now
+            self.tokens -= units
+            return max(0.0, -self.tokens / self.rate_per_second)
+
+
+class _QuotaRateLimiter:
+    def __init__(self, units_per_second: float, read_share: float, write_share: float, burst_seconds: float = 1.0):
+        total_share = max(0.001, read_share + write_share)
+        self.units_per_second = units_per_second
+        self.buckets = {
+            "read": _TokenBucket(
+                units_per_second * read_share / total_share,
+                units_per_second * read_share / total_share * burst_seconds,
+            ),
+            "write": _TokenBucket(
+                units_per_second * write_share / total_share,
+                units_per_second * write_share / total_share * burst_seconds,
+            ),
+        }
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    def acquire(self, bucket: str, units: int) -> float:
+        wait = self.buckets[bucket].reserve(units)
+        if wait > 0:
+            time.sleep(wait)
+        with self._stats_lock:
+            self.stats[f"{bucket}_units"] += units
+            self.stats[f"{bucket}_calls"] += 1
+            self.stats["waited_ms"] += int(wait * 1000)
+        return wait
+
+
+def _load_rate_limiter(config_path: Path) -> _QuotaRateLimiter:
+    rate_limit: Dict[str, Any] = {}
+    if config_path.exists():
+        loaded = _read_json(config_path).get("rate_limit")
+        rate_limit = loaded if isinstance(loaded, dict) else {}
+    units_per_second = rate_limit.get("quota_units_per_second_per_user")
+    if os.getenv("GMAIL_QUOTA_UNITS_PER_SECOND"):
+        units_per_second = float(os.environ["GMAIL_QUOTA_UNITS_PER_SECOND"])
+    if not isinstance(units_per_second, (int, float)) or units_per_second <= 0:
+        per_100s = rate_limit.get("requests_per_100s_per_user")
+        units_per_second = (
+            per_100s / 100 if isinstance(per_100s, (int, float)) and per_100s > 0 else GMAIL_QUOTA_UNITS_PER_SECOND_DEFAULT
+        )
+    balance = rate_limit.get("read_write_balance")
+    balance = balance if isinstance(balance, dict) else {}
+    burst_seconds = rate_limit.get("burst_seconds")
+    return _QuotaRateLimiter(
+        units_per_second=float(units_per_second),
+        read_share=float(balance.get("read", 0.8)),
+        write_share=float(balance.get("write", 0.2)),
+        burst_seconds=float(burst_seconds) if isinstance(burst_seconds, (int, float)) and burst_seconds > 0 else 1.0,
+    )
+
+
+_GMAIL_RATE_LIMITER: Optional[_QuotaRateLimiter] = None
+_GMAIL_RATE_LIMITER_LOCK = threading.Lock()
+
+
+def _gmail_rate_limiter() -> _QuotaRateLimiter:
+    global _GMAIL_RATE_LIMITER
+    with _GMAIL_RATE_LIMITER_LOCK:
+        if _GMAIL_RATE_LIMITER is None:
+            _GMAIL_RATE_LIMITER = _load_rate_limiter(MCP_SERVER_CONFIG_PATH)
+        return _GMAIL_RATE_LIMITER
+
+
+class _AdaptiveConcurrency:
+    # AIMD window over in-flight Gmail HTTP requests: +1 per window of healthy responses,
+    # halved on 429/5xx/network errors at most once per window of responses.
+    def __init__(
+        self,
+        max_window: int = 1,
+        min_window: int = 1,
+        decrease_factor: float = 0.5,
+        latency_factor: float = 3.0,
+        max_decisions: int = 50,
+    ):
+        self.min_window = max(1, min_window)
+        self.max_window = max(self.min_window, max_window)
+        self.window = float(self.max_window)
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.max_decisions = max_decisions
+        self.in_flight = 0
+        self.stats = Counter()
+        self.decisions: List[Dict[str, Any]] = []
+        self._base_latency: Dict[str, float] = {}
+        # Primed to a full window so the first congestion signal can cut it straight away.
+        self._since_decrease = int(self.window)
+        self._started = time.monotonic()
+        self._cond = threading.Condition()
+
+    def configure(self, max_window: int) -> None:
+        with self._cond:
+            self.max_window = max(self.min_window, max_window)
+            self.window = float(max(self.min_window, (self.max_window + 1) // 2))
+            self._since_decrease = int(self.window)
+            self._cond.notify_all()
+
+    def ensure(self, max_window: int) -> None:
+        # Callers asking for more parallelism than configured lift the cap; AIMD then only
+        # shrinks below it. A window already cut by congestion keeps its reduction.
+        with self._cond:
+            if max_window > self.max_window:
+                self.window += max_window - self.max_window
+                self.max_window = max_window
+                self._since_decrease = int(self.window)
+                self._cond.notify_all()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.window):
+                self.stats["waits"] += 1
+                self._cond.wait()
+            self.in_flight += 1
+
+    def _decide(self, action: str, reason: str) -> None:
+        self.stats[f"{action}s"] += 1
+        self.decisions.append(
+            {
+                "t_ms": int((time.monotonic() - self._started) * 1000),
+                "action": action,
+                "reason": reason,
+                "window": int(self.window),
+            }
+        )
+        if len(self.decisions) > self.max_decisions:
+            del self.decisions[0]
+
+    def release(self, endpoint: str, outcome: str, latency: float) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self.stats["calls"] += 1
+            self._since_decrease += 1
+            if outcome != "ok":
+                self.stats[f"congestion_{outcome}"] += 1
+                if self._since_decrease >= int(self.window) and self.window > self.min_window:
+                    self.window = max(float(self.min_window), self.window * self.decrease_factor)
+                    self._since_decrease = 0
+                    self._decide("decrease", outcome)
+            else:
+                base = self._base_latency.get(endpoint)
+                if base is None or latency < base:
+                    self._base_latency[endpoint] = base = latency
+                if latency > base * self.latency_factor + 0.05:
+                    self.stats["slow_responses"] += 1
+                elif self.window < self.max_window:
+                    before = int(self.window)
+                    self.window = min(float(self.max_window), self.window + 1.0 / self.window)
+                    if int(self.window) > before:
+                        self._decide("increase", "healthy")
+            self._cond.notify_all()
+
+    def report(self) -> Dict[str, Any]:
+        with self._cond:
+            result = {
+                "window": int(self.window),
+                "min_window": self.min_window,
+                "max_window": self.max_window,
+                "calls": self.stats["calls"],
+                "increases": self.stats["increases"],
+                "decreases": self.stats["decreases"],
+                "slow_responses": self.stats["slow_responses"],
+                "waits": self.stats["waits"],
+                "congestion": {
+                    key[len("congestion_"):]: value for key, value in sorted(self.stats.items()) if key.startswith("congestion_")
+                },
+                "decisions": list(self.decisions),
+            }
+            self.stats = Counter()
+            self.decisions = []
+            return result
+
+
+_GMAIL_CONCURRENCY = _AdaptiveConcurrency()
+
+
+class _GmailMetrics:
+    # Per-endpoint call/retry/byte counters and a bounded latency reservoir.
+    SAMPLE_LIMIT = 4096
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+
+    def _entry(self, endpoint: str) -> Dict[str, Any]:
+        entry = self._endpoints.get(endpoint)
+        if entry is None:
+            entry = {"counts": Counter(), "latencies": [], "seen": 0, "latency_sum": 0.0}
+            self._endpoints[endpoint] = entry
+        return entry
+
+    def observe(self, endpoint: str, latency: float, bytes_out: int, bytes_in: int, status: int) -> None:
+        with self._lock:
+            entry = self._entry(endpoint or "unknown")
+            counts = entry["counts"]
+            counts["calls"] += 1
+            counts["bytes_out"] += bytes_out
+            counts["bytes_in"] += bytes_in
+            if status >= 400 or status == 0:
+                counts["errors"] += 1
+            entry["seen"] += 1
+            entry["latency_sum"] += latency
+            samples = entry["latencies"]
+            if len(samples) < self.SAMPLE_LIMIT:
+                samples.append(latency)
+            else:
+                slot = random.randrange(entry["seen"])
+                if slot < self.SAMPLE_LIMIT:
+                    samples[slot] = latency
+
+    def count(self, endpoint: str, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._entry(endpoint or "unknown")["counts"][key] += amount
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints, self._endpoints = self._endpoints, {}
+        result: Dict[str, Any] = {}
+        for endpoint, entry in sorted(endpoints.items()):
+            counts = entry["counts"]
+            ordered = sorted(entry["latencies"])
+            latency_ms = {
+                f"p{int(q * 100)}": round(ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))] * 1000, 2)
+                if ordered
+                else None
+                for q in self.QUANTILES
+            }
+            latency_ms["sum"] = round(entry["latency_sum"] * 1000, 2)
+            result[endpoint] = {
+                "calls": counts["calls"],
+                "retries": counts["retries"],
+                "errors": counts["errors"],
+                "bytes_out": counts["bytes_out"],
+                "bytes_in": counts["bytes_in"],
+                "latency_ms": latency_ms,
+            }
+        return result
+
+
+_GMAIL_METRICS = _GmailMetrics()
+
+
+def _gmail_endpoint_name(method: str, path: str) -> str:
+    parts = [p for p in path.split("?", 1)[0].split("/") if p]
+    if not parts:
+        return "unknown"
+    if parts[0] == "labels":
+        return "labels.create" if method == "POST" else "labels.list"
+    if parts[0] == "history":
+        return "history.list"
+    if parts[0] == "profile":
+        return "profile.get"
+    if parts[0] == "messages":
+        if len(parts) == 1:
+            return "messages.list"
+        if parts[1] == "batchModify":
+            return "messages.batchModify"
+        if len(parts) == 2:
+            return "messages.get"
+        return f"messages.{parts[2]}"
+    return parts[0]
+
+
+def _gmail_quota_cost(endpoint: str, method: str) -> Tuple[str, int]:
+    return GMAIL_QUOTA_UNIT_COSTS.get(endpoint, ("read" if method == "GET" else "write", 5))
+
+
+def _load_retry_policy(config_path: Path) -> Dict[str, Any]:
+    policy = dict(GMAIL_RETRY_POLICY_DEFAULT)
+    if config_path.exists():
+        startup = _read_json(config_path).get("startup")
+        retry = startup.get("retry") if isinstance(startup, dict) else None
+        if isinstance(retry, dict):
+            for key in ("max_attempts", "base_delay_ms", "max_delay_ms", "jitter"):
+                if isinstance(retry.get(key), (int, float)) and retry[key] >= 0:
+                    policy[key] = retry[key]
+            codes = retry.get("retry_status_codes")
+            if isinstance(codes, list) and all(isinstance(c, int) for c in codes):
+                policy["retry_status_codes"] = codes
+    policy["retry_status_codes"] = set(policy["retry_status_codes"])
+    return policy
+
+
+_GMAIL_RETRY_POLICY: Optional[Dict[str, Any]] = None
+
+
+def _gmail_retry_policy() -> Dict[str, Any]:
+    global _GMAIL_RETRY_POLICY
+    if _GMAIL_RETRY_POLICY is None:
+        _GMAIL_RETRY_POLICY = _load_retry_policy(MCP_SERVER_CONFIG_PATH)
+    return _GMAIL_RETRY_POLICY
+
+
+def _retry_delay_seconds(policy: Dict[str, Any], retry_index: int, retry_after: Optional[str]) -> float:
+    if retry_after:
+        try:
+            seconds = float(retry_after)
+        except ValueError:
+            try:
+                seconds = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                seconds = -1.0
+        if seconds >= 0:
+            return min(float(GMAIL_RETRY_AFTER_MAX_SECONDS), seconds)
+    base = min(policy["max_delay_ms"], policy["base_delay_ms"] * (2 ** retry_index)) / 1000.0
+    jitter = float(policy["jitter"])
+    return base * random.uniform(1.0 - jitter, 1.0 + jitter)
+
+
+def _default_dead_letter_path() -> Path:
+    override = os.getenv("GMAIL_DEAD_LETTER_FILE")
+    if override:
+        return Path(override)
+    token_file = os.getenv("GMAIL_TOKEN_FILE")
+    base_dir = Path(token_file).parent if token_file else (ROOT / ".tokens")
+    return base_dir / "gmail_dead_letter.jsonl"
+
+
+_DEAD_LETTER_LOCK = threading.Lock()
+
+
+def _dead_letter_next_step(error_code: Any) -> str:
+    if error_code == 429:
+        return "quota exhausted after backoff; rerun later or lower --concurrency"
+    if error_code in {500, 502, 503, 504}:
+        return "gmail unavailable after backoff; rerun the same run id once the service recovers"
+    if error_code == 400:
+        return "request rejected; rerun --plan-only validation before retrying"
+    if error_code == 401:
+        return "reauthorize with --oauth-login; refresh did not restore access"
+    if error_code == 403:
+        return "check OAuth scopes and consent state"
+    if error_code == 404:
+        return "target no longer exists; drop it from the queue"
+    if error_code == "network":
+        return "check network connectivity and rerun"
+    return "inspect the error and rerun the affected ids"
+
+
+def _record_dead_letter(
+    method: str,
+    endpoint: str,
+    url: str,
+    error_code: Any,
+    retry_count: int,
+    detail: str,
+) -> None:
+    parsed = urlparse(url)
+    bucket, _ = _gmail_quota_cost(endpoint, method)
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "request_context": {
+            "method": method,
+            "endpoint": endpoint,
+            "path": parsed.path,
+            "priority": bucket,
+        },
+        "error_code": error_code,
+        "retry_count": retry_count,
+        "action": "retry_exhausted" if retry_count else "failed_permanent",
+        "operator_next_step": _dead_letter_next_step(error_code),
+        "detail": detail[:400],
+    }
+    with _DEAD_LETTER_LOCK:
+        _append_jsonl(_default_dead_letter_path(), record)
+
+
+def _gmail_send(
+    token_data: Dict[str, Any],
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    data: Optional[bytes] = None,
+    retry_401: bool = True,
+    quota: Optional[Dict[str, int]] = None,
+    endpoint: str = "",
+    idempotent: Optional[bool] = None,
+    expected_status: Iterable[int] = (),
+) -> Tuple[int, Dict[str, str], bytes]:
+    policy = _gmail_retry_policy()
+    max_retries = max(0, int(policy["max_attempts"]) - 1)
+    if idempotent is None:
+        idempotent = method == "GET" or endpoint in GMAIL_IDEMPOTENT_POST_ENDPOINTS
+    retry_count = 0
+    tokens = _token_manager_for(token_data)
+    while True:
+        for bucket, units in sorted((quota or {}).items()):
+            _gmail_rate_limiter().acquire(bucket, units)
+        request_headers = dict(headers or {})
+        access_token = tokens.access_token()
+        request_headers["Authorization"] = f"Bearer {access_token}"
+        # Google only serves gzip to clients that also advertise it in the User-Agent.
+        request_headers.setdefault("Accept-Encoding", "gzip")
+        request_headers.setdefault("User-Agent", "gmail-agent-sys (gzip)")
+        _GMAIL_CONCURRENCY.acquire()
+        started = time.monotonic()
+        try:
+            status, response_headers, raw = _GMAIL_POOL.request(method, url, headers=request_headers, data=data)
+        except (OSError, http.client.HTTPException) as exc:
+            elapsed = time.monotonic() - started
+            _GMAIL_CONCURRENCY.release(endpoint, "network", elapsed)
+            _GMAIL_METRICS.observe(endpoint, elapsed, len(data or b""), 0, 0)
+            if idempotent and retry_count < max_retries:
+                _GMAIL_METRICS.count(endpoint, "retries")
+                time.sleep(_retry_delay_seconds(policy, retry_count, None))
+                retry_count += 1
+                continue
+            _record_dead_letter(method, endpoint, url, "network", retry_count, str(exc))
+            raise ValueError(f"gmail api request failed: {exc}") from exc
+        elapsed = time.monotonic() - started
+        _GMAIL_CONCURRENCY.release(endpoint, str(status) if status in policy["retry_status_codes"] else "ok", elapsed)
+        _GMAIL_METRICS.observe(endpoint, elapsed, len(data or b""), len(raw), status)
+        if response_headers.get("content-encoding", "").strip().lower() == "gzip":
+            try:
+                raw = gzip.decompress(raw)
+            except (OSError, EOFError) as exc:
+                raise ValueError(f"gmail api returned corrupt gzip body: {exc}") from exc
+        if status == 401 and retry_401:
+            tokens.refresh(stale_access_token=access_token)
+            retry_401 = False
+            continue
+        if (
+            status in policy["retry_status_codes"]
+            and (idempotent or status == 429)
+            and retry_count < max_retries
+        ):
+            _GMAIL_METRICS.count(endpoint, "retries")
+            time.sleep(_retry_delay_seconds(policy, retry_count, response_headers.get("retry-after")))
+            retry_count += 1
+            continue
+        if status >= 400:
+            detail = raw.decode("utf-8", errors="ignore")
+            if status not in expected_status:
+                _record_dead_letter(method, endpoint, url, status, retry_count, detail)
+            raise ValueError(f"gmail api error {status}: {detail[:400]}")
+        return status, response_headers, raw
+
+
 def _gmail_request(
     token_data: Dict[str, Any],
     method: str,
@@ -427,54 +1143,114 @@ def _gmail_request(
     params: Optional[Dict[str, Any]] = None,
     body: Optional[Dict[str, Any]] = None,
     retry_401: bool = True,
+    expected_status: Iterable[int] = (),
 ) -> Dict[str, Any]:
     url = f"{GMAIL_API_BASE}{path}"
     if params:
         query = urlencode(params, doseq=True)
         if query:
             url = f"{url}?{query}"
-    headers = {
-        "Authorization": f"Bearer {token_data['access_token']}",
-        "Accept": "application/json",
-    }
+    headers = {"Accept": "application/json"}
     data = None
     if body is not None:
         headers["Content-Type"] = "application/json; charset=utf-8"
         data = json.dumps(body, ensure_ascii=False).encode("utf-8")
 
-    req = Request(url, method=method, headers=headers, data=data)
-    try:
-        with urlopen(req, timeout=GMAIL_REQUEST_TIMEOUT_SECONDS) as resp:
-            raw = resp.read().decode("utf-8")
-            return json.loads(raw) if raw else {}
-    except HTTPError as exc:
-        if exc.code == 401 and retry_401:
-            token_data = _refresh_access_token(token_data)
-            return _gmail_request(
-                token_data=token_data,
-                method=method,
-                path=path,
-                params=params,
-                body=body,
-                retry_401=False,
-            )
-        detail = exc.read().decode("utf-8", errors="ignore")
-        raise ValueError(f"gmail api error {exc.code}: {detail[:400]}") from exc
-    except URLError as exc:
-        raise ValueError(f"gmail api request failed: {exc}") from exc
+    endpoint = _gmail_endpoint_name(method, path)
+    bucket, units = _gmail_quota_cost(endpoint, method)
+    _, _, raw = _gmail_send(
+        token_data,
+        method,
+        url,
+        headers=headers,
+        data=data,
+        retry_401=retry_401,
+        quota={bucket: units},
+        endpoint=endpoint,
+        expected_status=expected_status,
+    )
+    text = raw.decode("utf-8")
+    return json.loads(text) if text else {}
 
 
-def _gmail_list_labels(token_data: Dict[str, Any]) -> Dict[str, str]:
-    resp = _gmail_request(token_data, "GET", "/labels")
-    mapping: Dict[str, str] = {}
-    for item in resp.get("labels", []):
-        if isinstance(item, dict) and isinstance(item.get("name"), str) and isinstance(item.get("id"), str):
-            mapping[item["name"]] = item["id"]
-    return mapping
+def _gmail_batch_url() -> str:
+    parsed = urlparse(GMAIL_API_BASE)
+    api_path = parsed.path.split("/users/", 1)[0]
+    return f"{parsed.scheme}://{parsed.netloc}/batch{api_path}"
+
+
+def _parse_gmail_batch_response(content_type: str, raw: bytes) -> Dict[int, Tuple[int, Dict[str, Any]]]:
+    match = re.search(r'boundary="?([^";]+)"?', content_type or "")
+    if not match:
+        raise ValueError("gmail batch response missing multipart boundary")
+    delimiter = b"--" + match.group(1).encode("ascii")
+    parts: Dict[int, Tuple[int, Dict[str, Any]]] = {}
+    for chunk in raw.replace(b"\r\n", b"\n").split(delimiter)[1:]:
+        if chunk.startswith(b"--"):
+            break
+        outer_headers, _, inner = chunk.strip(b"\n").partition(b"\n\n")
+        content_id = re.search(rb"content-id:\s*<response-item(\d+)>", outer_headers, re.IGNORECASE)
+        if not content_id:
+            continue
+        status_and_headers, _, body = inner.partition(b"\n\n")
+        status_line = status_and_headers.split(b"\n", 1)[0].split()
+        try:
+            status = int(status_line[1])
+        except (IndexError, ValueError):
+            status = 0
+        text = body.strip().decode("utf-8", errors="ignore")
+        try:
+            payload = json.loads(text) if text else {}
+        except json.JSONDecodeError:
+            payload = {"raw": text[:400]}
+        parts[int(content_id.group(1))] = (status, payload if isinstance(payload, dict) else {})
+    return parts
+
+
+def _gmail_batch_request(
+    token_data: Dict[str, Any],
+    calls: List[Tuple[str, str, Optional[Dict[str, Any]]]],
+) -> List[Tuple[int, Dict[str, Any]]]:
+    if len(calls) > GMAIL_BATCH_MAX_PARTS:
+        raise ValueError(f"gmail batch supports at most {GMAIL_BATCH_MAX_PARTS} parts")
+    api_path = urlparse(GMAIL_API_BASE).path
+    boundary = f"batch_{secrets.token_hex(12)}"
+    lines: List[str] = []
+    quota_units: Dict[str, int] = defaultdict(int)
+    for idx, (method, path, params) in enumerate(calls):
+        bucket, units = _gmail_quota_cost(_gmail_endpoint_name(method, path), method)
+        quota_units[bucket] += units
+        target = f"{api_path}{path}"
+        if params:
+            target = f"{target}?{urlencode(params, doseq=True)}"
+        lines.extend(
+            [
+                f"--{boundary}",
+                "Content-Type: application/http",
+                f"Content-ID: <item{idx}>",
+                "",
+                f"{method} {target}",
+                "",
+            ]
+        )
+    lines.append(f"--{boundary}--")
+    _, headers, raw = _gmail_send(
+        token_data,
+        "POST",
+        _gmail_batch_url(),
+        headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+        data=("\r\n".join(lines) + "\r\n").encode("utf-8"),
+        # The batch endpoint charges every sub-request individually.
+        quota=dict(quota_units),
+        endpoint="batch",
+        idempotent=all(method == "GET" for method, _, _ in calls),
+    )
+    parts = _parse_gmail_batch_response(headers.get("content-type", ""), raw)
+    return [parts.get(idx, (0, {})) for idx in range(len(calls))]
 
 
 def _gmail_list_labels_full(token_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-    resp = _gmail_request(token_data, "GET", "/labels")
+    resp = _gmail_request(token_data, "GET", "/labels", params={"fields": GMAIL_LABELS_FIELDS})
     labels = resp.get("labels", [])
     return labels if isinstance(labels, list) else []
 
@@ -487,7 +1263,7 @@ def _gmail_list_messages(
     ids: List[str] = []
     page_token = None
     while True:
-        params: Dict[str, Any] = {"q": query, "maxResults": 500}
+        params: Dict[str, Any] = {"q": query, "maxResults": 500, "fields": GMAIL_LIST_FIELDS}
         if page_token:
             params["pageToken"] = page_token
         resp = _gmail_request(token_data, "GET", "/messages", params=params)
@@ -507,24 +1283,118 @@ def _gmail_create_label(token_data: Dict[str, Any], name: str) -> str:
         token_data,
         "POST",
         "/labels",
+        params={"fields": GMAIL_MUTATE_FIELDS},
         body={
             "name": name,
             "labelListVisibility": "labelShow",
             "messageListVisibility": "show",
         },
+        expected_status=(409,),
     )
     label_id = resp.get("id")
     if not isinstance(label_id, str) or not label_id:
         raise ValueError(f"failed to create label: {name}")
+    _label_catalogue_for(token_data).add({"id": label_id, "name": name, "type": "user"})
     return label_id
 
 
+class _LabelCatalogue:
+    # One account's label list, fetched once per process and kept current by our own
+    # creates; reloaded after the TTL or when a name or id turns out to be unknown.
+    def __init__(self, ttl_seconds: float = GMAIL_LABEL_CACHE_TTL_SECONDS_DEFAULT):
+        self.ttl_seconds = ttl_seconds
+        self._labels: Optional[List[Dict[str, Any]]] = None
+        self._by_name: Dict[str, str] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _store(self, labels: List[Dict[str, Any]]) -> None:
+        self._labels = [
+            item
+            for item in labels
+            if isinstance(item, dict) and isinstance(item.get("name"), str) and isinstance(item.get("id"), str)
+        ]
+        self._by_name = {item["name"]: item["id"] for item in self._labels}
+        mirror = _metadata_mirror()
+        if mirror is not None:
+            mirror.set_label_catalogue(self._labels)
+
+    def labels(self, token_data: Dict[str, Any], refresh: bool = False) -> List[Dict[str, Any]]:
+        with self._lock:
+            if refresh or self._labels is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+                self._store(_gmail_list_labels_full(token_data))
+                self._loaded_at = time.monotonic()
+            return list(self._labels or [])
+
+    def name_map(self, token_data: Dict[str, Any], refresh: bool = False) -> Dict[str, str]:
+        self.labels(token_data, refresh=refresh)
+        with self._lock:
+            return dict(self._by_name)
+
+    def lookup(self, token_data: Dict[str, Any], name: str) -> Optional[str]:
+        label_id = self.name_map(token_data).get(name)
+        if label_id is None:
+            label_id = self.name_map(token_data, refresh=True).get(name)
+        return label_id
+
+    def add(self, label: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._labels is None:
+                return
+            self._store([item for item in self._labels if item["name"] != label["name"]] + [label])
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._labels = None
+
+
+_LABEL_CATALOGUES: Dict[Any, _LabelCatalogue] = {}
+_LABEL_CATALOGUES_LOCK = threading.Lock()
+
+
+def _label_catalogue_for(token_data: Dict[str, Any]) -> _LabelCatalogue:
+    manager = _token_manager_for(token_data)
+    account = str(manager.token_file.resolve()) if manager.token_file is not None else id(manager)
+    with _LABEL_CATALOGUES_LOCK:
+        catalogue = _LABEL_CATALOGUES.get((GMAIL_API_BASE, account))
+        if catalogue is None:
+            ttl = float(os.getenv("GMAIL_LABEL_CACHE_TTL_SECONDS", GMAIL_LABEL_CACHE_TTL_SECONDS_DEFAULT))
+            catalogue = _LabelCatalogue(ttl_seconds=ttl)
+            _LABEL_CATALOGUES[(GMAIL_API_BASE, account)] = catalogue
+        return catalogue
+
+
+def _ensure_labels(token_data: Dict[str, Any], names: Iterable[str]) -> Dict[str, str]:
+    catalogue = _label_catalogue_for(token_data)
+    label_map = catalogue.name_map(token_data)
+    for name in sorted(set(names), key=lambda x: x.count("/")):
+        if name in label_map:
+            continue
+        try:
+            label_map[name] = _gmail_create_label(token_data, name)
+        except ValueError as exc:
+            # 409 means another client created it since our list; reload and reuse that id.
+            if not str(exc).startswith("gmail api error 409"):
+                raise
+            label_id = catalogue.name_map(token_data, refresh=True).get(name)
+            if label_id is None:
+                raise
+            label_map[name] = label_id
+    return label_map
+
+
+def _invalidate_labels_on_error(token_data: Dict[str, Any], exc: ValueError) -> None:
+    message = str(exc).lower()
+    if message.startswith(("gmail api error 400", "gmail api error 404")) and "label" in message:
+        _label_catalogue_for(token_data).invalidate()
+
+
 def _gmail_list_recent_messages(token_data: Dict[str, Any], query: str, max_results: int) -> List[str]:
     resp = _gmail_request(
         token_data,
         "GET",
         "/messages",
-        params={"q": query, "maxResults": max_results},
+        params={"q": query, "maxResults": max_results, "fields": GMAIL_LIST_FIELDS},
     )
     ids: List[str] = []
     for item in resp.get("messages", []):
@@ -533,54 +1403,535 @@ def _gmail_list_recent_messages(token_data: Dict[str, Any], query: str, max_resu
     return ids
 
 
-def _gmail_get_message_metadata(token_data: Dict[str, Any], message_id: str) -> Dict[str, Any]:
-    resp = _gmail_request(
-        token_data,
+class _MetadataMirror:
+    # Local SQLite copy of message metadata. From/subject never change, so a row only
+    # goes stale through label changes; rows are trusted while fetched within the TTL
+    # or after the last full mailbox sync, and our own mutations write through.
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS messages (
+            id TEXT PRIMARY KEY,
+            thread_id TEXT,
+            sender TEXT NOT NULL,
+            sender_norm TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            label_ids TEXT NOT NULL,
+            internal_date INTEGER,
+            history_id TEXT,
+            fetched_at REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS messages_sender_norm ON messages (sender_norm)",
+        "CREATE INDEX IF NOT EXISTS messages_internal_date ON messages (internal_date)",
+        "CREATE TABLE IF NOT EXISTS mirror_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    ]
+
+    def __init__(self, path: Path, ttl_seconds: float = GMAIL_MIRROR_TTL_SECONDS_DEFAULT):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            stats, self.stats = self.stats, Counter()
+        return {"path": str(self.path), "current": self.is_current(), **dict(sorted(stats.items()))}
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM mirror_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, values: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO mirror_meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                [(key, str(value)) for key, value in values.items()],
+            )
+
+    def _valid_after(self) -> float:
+        # While a sync is recent every row is served, however old its fetch: labels are
+        # only as fresh as the last --sync. Paths that mutate from labelIds pass refresh=True.
+        return 0.0 if self.is_current() else time.time() - self.ttl_seconds
+
+    def is_current(self) -> bool:
+        synced_at = self.get_meta("synced_at")
+        return bool(self.get_meta("full_scan_at")) and bool(synced_at) and float(synced_at) >= time.time() - self.ttl_seconds
+
+    @staticmethod
+    def _row_to_meta(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        return {
+            "id": row[0],
+            "threadId": row[1],
+            "from": row[2],
+            "subject": row[4],
+            "labelIds": json.loads(row[5]),
+            "internalDate": row[6],
+            "historyId": row[7],
+        }
+
+    def get_valid(self, message_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        valid_after = self._valid_after()
+        with self._lock:
+            for start in range(0, len(message_ids), 500):
+                chunk = message_ids[start : start + 500]
+                rows = self._conn.execute(
+                    f"SELECT id, thread_id, sender, sender_norm, subject, label_ids, internal_date, history_id "
+                    f"FROM messages WHERE fetched_at >= ? AND id IN ({','.join('?' * len(chunk))})",
+                    [valid_after, *chunk],
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = self._row_to_meta(row)
+            self.stats["hits"] += len(found)
+            self.stats["misses"] += len(message_ids) - len(found)
+        return found
+
+    def upsert(self, metas: Iterable[Dict[str, Any]], fetched_at: Optional[float] = None) -> int:
+        now = fetched_at if fetched_at is not None else time.time()
+        rows = [
+            (
+                meta["id"],
+                meta.get("threadId"),
+                meta.get("from", "") or "",
+                _normalize_email_address(meta.get("from", "")),
+                meta.get("subject", "") or "",
+                json.dumps(sorted(meta.get("labelIds") or [])),
+                meta.get("internalDate"),
+                meta.get("historyId"),
+                now,
+            )
+            for meta in metas
+            if isinstance(meta, dict) and isinstance(meta.get("id"), str)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO messages (id, thread_id, sender, sender_norm, subject, label_ids, internal_date, history_id, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                "thread_id = excluded.thread_id, sender = excluded.sender, sender_norm = excluded.sender_norm, "
+                "subject = excluded.subject, label_ids = excluded.label_ids, "
+                "internal_date = COALESCE(excluded.internal_date, messages.internal_date), "
+                "history_id = COALESCE(excluded.history_id, messages.history_id), fetched_at = excluded.fetched_at",
+                rows,
+            )
+            self.stats["upserts"] += len(rows)
+        return len(rows)
+
+    def apply_label_delta(self, message_ids: List[str], add_label_ids: List[str], remove_label_ids: List[str]) -> None:
+        if not message_ids:
+            return
+        with self._lock:
+            for start in range(0, len(message_ids), 500):
+                chunk = message_ids[start : start + 500]
+                rows = self._conn.execute(
+                    f"SELECT id, label_ids FROM messages WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                updates = []
+                for mid, raw_labels in rows:
+                    labels = set(json.loads(raw_labels))
+                    labels.update(add_label_ids)
+                    labels.difference_update(remove_label_ids)
+                    updates.append((json.dumps(sorted(labels)), mid))
+                self._conn.executemany("UPDATE messages SET label_ids = ? WHERE id = ?", updates)
+
+    def delete(self, message_ids: Iterable[str]) -> int:
+        with self._lock:
+            cursor = self._conn.executemany("DELETE FROM messages WHERE id = ?", [(mid,) for mid in message_ids])
+            return max(0, cursor.rowcount)
+
+    def known_ids(self, message_ids: Iterable[str]) -> set:
+        ids = list(message_ids)
+        known = set()
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start : start + 500]
+                known.update(
+                    row[0]
+                    for row in self._conn.execute(
+                        f"SELECT id FROM messages WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                )
+        return known
+
+    def all_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM messages").fetchall()]
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0])
+
+    def label_catalogue(self) -> Optional[List[Dict[str, Any]]]:
+        raw = self.get_meta("label_catalogue")
+        return json.loads(raw) if raw else None
+
+    def set_label_catalogue(self, labels: List[Dict[str, Any]]) -> None:
+        catalogue = [
+            {"id": item["id"], "name": item["name"], "type": item.get("type")}
+            for item in labels
+            if isinstance(item, dict) and isinstance(item.get("id"), str) and isinstance(item.get("name"), str)
+        ]
+        self.set_meta({"label_catalogue": json.dumps(catalogue, ensure_ascii=False)})
+
+    def select_window(self, newer_than_ms: int, older_than_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        # Matches the default messages.list scope: spam and trash are never returned.
+        sql = (
+            "SELECT id, thread_id, sender, sender_norm, subject, label_ids, internal_date, history_id FROM messages "
+            "WHERE internal_date > ? AND label_ids NOT LIKE '%\"TRASH\"%' AND label_ids NOT LIKE '%\"SPAM\"%'"
+        )
+        params: List[Any] = [newer_than_ms]
+        if older_than_ms is not None:
+            sql += " AND internal_date < ?"
+            params.append(older_than_ms)
+        sql += " ORDER BY internal_date DESC, id"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self.stats["offline_reads"] += len(rows)
+        return [self._row_to_meta(row) for row in rows]
+
+
+def _default_mirror_path() -> Path:
+    override = os.getenv("GMAIL_MIRROR_DB")
+    if override:
+        return Path(override)
+    token_file = os.getenv("GMAIL_TOKEN_FILE")
+    base_dir = Path(token_file).parent if token_file else (ROOT / ".tokens")
+    return base_dir / "gmail_mirror.sqlite3"
+
+
+_METADATA_MIRROR: Optional[_MetadataMirror] = None
+_METADATA_MIRROR_ENABLED = os.getenv("GMAIL_MIRROR_DB", "") != "off"
+_METADATA_MIRROR_LOCK = threading.Lock()
+
+
+def _metadata_mirror() -> Optional[_MetadataMirror]:
+    global _METADATA_MIRROR
+    if not _METADATA_MIRROR_ENABLED:
+        return None
+    with _METADATA_MIRROR_LOCK:
+        if _METADATA_MIRROR is None:
+            ttl = float(os.getenv("GMAIL_MIRROR_TTL_SECONDS", GMAIL_MIRROR_TTL_SECONDS_DEFAULT))
+            _METADATA_MIRROR = _MetadataMirror(_default_mirror_path(), ttl_seconds=ttl)
+        return _METADATA_MIRROR
+
+
+def _message_metadata_call(message_id: str) -> Tuple[str, str, Dict[str, Any]]:
+    return (
         "GET",
         f"/messages/{quote(message_id, safe='')}",
-        params={"format": "metadata", "metadataHeaders": ["From", "Subject"]},
+        {"format": "metadata", "metadataHeaders": ["From", "Subject"], "fields": GMAIL_METADATA_FIELDS},
     )
+
+
+def _gmail_get_message_metadata(
+    token_data: Dict[str, Any],
+    message_id: str,
+    expected_status: Iterable[int] = (),
+) -> Dict[str, Any]:
+    method, path, params = _message_metadata_call(message_id)
+    resp = _gmail_request(token_data, method, path, params=params, expected_status=expected_status)
+    return _parse_message_metadata(resp, message_id)
+
+
+def _parse_message_metadata(resp: Dict[str, Any], message_id: str) -> Dict[str, Any]:
     headers = {}
     for h in resp.get("payload", {}).get("headers", []):
         if isinstance(h, dict) and isinstance(h.get("name"), str):
             headers[h["name"].lower()] = h.get("value", "")
+    internal_date = resp.get("internalDate")
     return {
         "id": resp.get("id", message_id),
         "threadId": resp.get("threadId"),
         "from": headers.get("from", ""),
         "subject": headers.get("subject", ""),
         "labelIds": resp.get("labelIds", []) if isinstance(resp.get("labelIds"), list) else [],
+        "internalDate": int(internal_date) if str(internal_date or "").isdigit() else None,
+        "historyId": resp.get("historyId"),
     }
 
 
+def _gmail_get_messages_metadata(
+    token_data: Dict[str, Any],
+    message_ids: List[str],
+    errors: Optional[Dict[str, str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for start in range(0, len(message_ids), GMAIL_BATCH_MAX_PARTS):
+        chunk = message_ids[start : start + GMAIL_BATCH_MAX_PARTS]
+        retry_ids: List[str] = []
+        if len(chunk) == 1:
+            retry_ids = chunk
+        else:
+            try:
+                parts = _gmail_batch_request(token_data, [_message_metadata_call(mid) for mid in chunk])
+            except ValueError:
+                parts = [(0, {})] * len(chunk)
+            for mid, (status, resp) in zip(chunk, parts):
+                if status == 200:
+                    results[mid] = _parse_message_metadata(resp, mid)
+                else:
+                    retry_ids.append(mid)
+        for mid in retry_ids:
+            try:
+                # A message deleted since it was listed is an expected miss, not a dead letter.
+                results[mid] = _gmail_get_message_metadata(token_data, mid, expected_status=(404,))
+            except Exception as exc:
+                if errors is None:
+                    raise
+                errors[mid] = str(exc)
+    return results
+
+
+def _iter_message_metadata(
+    token_data: Dict[str, Any],
+    message_ids: List[str],
+    errors: Optional[Dict[str, str]] = None,
+    concurrency: int = 1,
+    refresh: bool = False,
+) -> Iterable[Tuple[str, Optional[Dict[str, Any]]]]:
+    chunks = (
+        message_ids[start : start + GMAIL_BATCH_MAX_PARTS] for start in range(0, len(message_ids), GMAIL_BATCH_MAX_PARTS)
+    )
+    for _, resolved, exc in _iter_gmail_calls(
+        token_data,
+        (("get_messages_metadata", _resolve_metadata_chunk, (chunk, errors, refresh)) for chunk in chunks),
+        concurrency,
+    ):
+        if exc is not None:
+            raise exc
+        yield from resolved
+
+
+def _resolve_metadata_chunk(
+    token_data: Dict[str, Any],
+    message_ids: List[str],
+    errors: Optional[Dict[str, str]],
+    refresh: bool,
+) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+    mirror = _metadata_mirror()
+    cached = mirror.get_valid(message_ids) if mirror is not None and not refresh else {}
+    missing = [mid for mid in message_ids if mid not in cached]
+    fetched = _gmail_get_messages_metadata(token_data, missing, errors) if missing else {}
+    if mirror is not None and fetched:
+        mirror.upsert(fetched.values())
+    return [(mid, cached.get(mid) or fetched.get(mid)) for mid in message_ids]
+
+
+def _gmail_get_profile(token_data: Dict[str, Any]) -> Dict[str, Any]:
+    return _gmail_request(token_data, "GET", "/profile", params={"fields": GMAIL_PROFILE_FIELDS})
+
+
+def _gmail_list_history(token_data: Dict[str, Any], start_history_id: str) -> Tuple[List[Dict[str, Any]], str]:
+    records: List[Dict[str, Any]] = []
+    latest = start_history_id
+    page_token = None
+    while True:
+        params: Dict[str, Any] = {
+            "startHistoryId": start_history_id,
+            "historyTypes": GMAIL_HISTORY_TYPES,
+            "maxResults": 500,
+            "fields": GMAIL_HISTORY_FIELDS,
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        resp = _gmail_request(token_data, "GET", "/history", params=params)
+        records.extend(item for item in resp.get("history", []) or [] if isinstance(item, dict))
+        latest = str(resp.get("historyId") or latest)
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            break
+    return records, latest
+
+
+def _mirror_label_delta(message_ids: List[str], add_label_ids: List[str], remove_label_ids: List[str]) -> None:
+    mirror = _metadata_mirror()
+    if mirror is not None:
+        mirror.apply_label_delta(message_ids, add_label_ids, remove_label_ids)
+
+
 def _gmail_modify_message(
     token_data: Dict[str, Any],
     message_id: str,
     add_label_ids: List[str],
     remove_label_ids: List[str],
+    expected_status: Iterable[int] = (),
 ) -> Dict[str, Any]:
-    return _gmail_request(
-        token_data,
-        "POST",
-        f"/messages/{quote(message_id, safe='')}/modify",
-        body={"addLabelIds": add_label_ids, "removeLabelIds": remove_label_ids},
-    )
+    try:
+        resp = _gmail_request(
+            token_data,
+            "POST",
+            f"/messages/{quote(message_id, safe='')}/modify",
+            params={"fields": GMAIL_MUTATE_FIELDS},
+            body={"addLabelIds": add_label_ids, "removeLabelIds": remove_label_ids},
+            expected_status=expected_status,
+        )
+    except ValueError as exc:
+        _invalidate_labels_on_error(token_data, exc)
+        raise
+    _mirror_label_delta([message_id], add_label_ids, remove_label_ids)
+    return resp
+
+
+def _gmail_batch_modify_messages(
+    token_data: Dict[str, Any],
+    message_ids: List[str],
+    add_label_ids: List[str],
+    remove_label_ids: List[str],
+    expected_status: Iterable[int] = (),
+) -> Dict[str, Any]:
+    if len(message_ids) > GMAIL_BATCH_MODIFY_MAX_IDS:
+        raise ValueError(f"batchModify supports at most {GMAIL_BATCH_MODIFY_MAX_IDS} ids")
+    try:
+        resp = _gmail_request(
+            token_data,
+            "POST",
+            "/messages/batchModify",
+            body={"ids": message_ids, "addLabelIds": add_label_ids, "removeLabelIds": remove_label_ids},
+            expected_status=expected_status,
+        )
+    except ValueError as exc:
+        _invalidate_labels_on_error(token_data, exc)
+        raise
+    _mirror_label_delta(message_ids, add_label_ids, remove_label_ids)
+    return resp
 
 
 def _gmail_trash_message(token_data: Dict[str, Any], message_id: str) -> Dict[str, Any]:
-    return _gmail_request(
+    resp = _gmail_request(
         token_data,
         "POST",
         f"/messages/{quote(message_id, safe='')}/trash",
+        params={"fields": GMAIL_MUTATE_FIELDS},
     )
+    _mirror_label_delta([message_id], ["TRASH"], [])
+    return resp
 
 
 def _gmail_untrash_message(token_data: Dict[str, Any], message_id: str) -> Dict[str, Any]:
-    return _gmail_request(
+    resp = _gmail_request(
         token_data,
         "POST",
         f"/messages/{quote(message_id, safe='')}/untrash",
+        params={"fields": GMAIL_MUTATE_FIELDS},
     )
+    _mirror_label_delta([message_id], [], ["TRASH"])
+    return resp
+
+
+_GMAIL_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_GMAIL_EXECUTOR_WORKERS = 0
+_GMAIL_EXECUTOR_LOCK = threading.Lock()
+
+
+def _gmail_executor(workers: int) -> ThreadPoolExecutor:
+    # One long-lived pool for every caller; only replaced when a caller needs more threads.
+    global _GMAIL_EXECUTOR, _GMAIL_EXECUTOR_WORKERS
+    with _GMAIL_EXECUTOR_LOCK:
+        if _GMAIL_EXECUTOR is None or _GMAIL_EXECUTOR_WORKERS < workers:
+            if _GMAIL_EXECUTOR is not None:
+                _GMAIL_EXECUTOR.shutdown(wait=False)
+            _GMAIL_EXECUTOR = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gmail-call")
+            _GMAIL_EXECUTOR_WORKERS = workers
+        return _GMAIL_EXECUTOR
+
+
+def _iter_gmail_calls(
+    token_data: Dict[str, Any],
+    calls: Iterable[Tuple[str, Callable[..., Any], Tuple[Any, ...]]],
+    concurrency: int = 1,
+    abort_failure_rate: Optional[float] = None,
+) -> Iterable[Tuple[Tuple[str, Callable[..., Any], Tuple[Any, ...]], Any, Optional[BaseException]]]:
+    # Keeps up to `concurrency` calls in flight and refills a slot as soon as any call
+    # finishes; outcomes come back in submission order. Once the failure rate passes
+    # abort_failure_rate, calls that have not started yet are reported as CancelledError.
+    pending_calls = iter(calls)
+    if concurrency <= 1:
+        for call in pending_calls:
+            try:
+                yield call, call[1](token_data, *call[2]), None
+            except Exception as exc:
+                yield call, None, exc
+        return
+    _GMAIL_CONCURRENCY.ensure(concurrency)
+    executor = _gmail_executor(concurrency)
+    queue: deque = deque()
+    completed = failed = 0
+    aborted = exhausted = False
+    try:
+        while True:
+            while not exhausted and len(queue) < concurrency * 2:
+                if sum(1 for _, future in queue if not future.done()) >= concurrency:
+                    break
+                call = next(pending_calls, None)
+                if call is None:
+                    exhausted = True
+                    break
+                if aborted:
+                    future: Future = Future()
+                    future.cancel()
+                else:
+                    future = executor.submit(call[1], token_data, *call[2])
+                queue.append((call, future))
+            if not queue:
+                return
+            call, future = queue[0]
+            if not future.done():
+                wait([f for _, f in queue if not f.done()], return_when=FIRST_COMPLETED)
+                continue
+            queue.popleft()
+            if future.cancelled():
+                yield call, None, CancelledError()
+                continue
+            exc = future.exception()
+            completed += 1
+            failed += exc is not None
+            yield call, (future.result() if exc is None else None), exc
+            if not aborted and abort_failure_rate is not None and failed and failed / completed > abort_failure_rate:
+                aborted = True
+                for _, queued in queue:
+                    queued.cancel()
+    finally:
+        for _, future in queue:
+            future.cancel()
+
+
+def _run_gmail_calls(
+    token_data: Dict[str, Any],
+    calls: List[Tuple[str, Callable[..., Any], Tuple[Any, ...]]],
+    concurrency: int = 1,
+    abort_failure_rate: Optional[float] = None,
+) -> List[Tuple[Any, Optional[BaseException]]]:
+    return [
+        (result, exc)
+        for _, result, exc in _iter_gmail_calls(token_data, calls, concurrency, abort_failure_rate=abort_failure_rate)
+    ]
+
+
+def _iter_query_message_ids(
+    token_data: Dict[str, Any],
+    queries: List[str],
+    max_total: Optional[int] = None,
+    concurrency: int = 1,
+    caps: Optional[List[Optional[int]]] = None,
+) -> Iterable[Tuple[str, List[str]]]:
+    query_caps = caps if caps is not None else [max_total] * len(queries)
+    for call, ids, exc in _iter_gmail_calls(
+        token_data,
+        (("list_messages", _gmail_list_messages, (query, cap)) for query, cap in zip(queries, query_caps)),
+        concurrency,
+    ):
+        if exc is not None:
+            raise exc
+        yield call[2][0], ids
 
 
 def _normalize_text(value: Any) -> str:
@@ -607,6 +1958,15 @@ def _append_jsonl(path: Path, payload: Dict[str, Any]) -> None:
         fh.write(json.dumps(payload, ensure_ascii=False) + "\n")
 
 
+def _append_jsonl_rows(path: Path, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as fh:
+        for payload in rows:
+            fh.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+
 def _load_jsonl(path: Path) -> List[Dict[str, Any]]:
     if not path.exists():
         raise FileNotFoundError(f"missing journal file: {path}")
@@ -631,45 +1991,137 @@ def _quote_gmail_term(value: str) -> str:
     cleaned = str(value or "").strip().replace('"', "")
     if not cleaned:
         return ""
-    return f"\"{cleaned}\"" if any(ch.isspace() for ch in cleaned) else cleaned
-
-
-def _build_rule_gmail_queries(rule: Dict[str, Any], base_query: str) -> List[str]:
-    queries: List[str] = []
-    base = base_query
-
-    from_patterns = [
-        p.strip()
-        for p in (rule.get("from_patterns") or [])
-        if isinstance(p, str) and p.strip()
-    ][:4]
-    subject_patterns = [
-        p.strip()
-        for p in (rule.get("subject_patterns") or [])
-        if isinstance(p, str) and p.strip()
-    ][:4]
-
-    for pattern in from_patterns:
-        queries.append(f"{base} from:{_quote_gmail_term(pattern)}")
-    for pattern in subject_patterns:
-        queries.append(f"{base} subject:{_quote_gmail_term(pattern)}")
-    if from_patterns and subject_patterns:
-        for from_pattern in from_patterns[:2]:
-            for subject_pattern in subject_patterns[:2]:
-                queries.append(
-                    f"{base} from:{_quote_gmail_term(from_pattern)} subject:{_quote_gmail_term(subject_pattern)}"
-                )
+    return f"\"{cleaned}\"" if any(ch.isspace() or ch in "()" for ch in cleaned) else cleaned
+
+
+def _rule_query_patterns(rule: Dict[str, Any]) -> Tuple[Optional[str], List[str]]:
+    # A rule needs its from side (when it has one) to match, so listing by from alone
+    # already covers it; subject terms are only listed for subject-only rules.
+    for field, key in (("from", "from_patterns"), ("subject", "subject_patterns")):
+        patterns = [p.strip() for p in (rule.get(key) or []) if isinstance(p, str) and p.strip()]
+        if patterns:
+            return field, patterns
+    return None, []
 
-    if not queries:
-        queries.append(base)
 
+def _mirror_pattern_yield(
+    metas: Iterable[Dict[str, Any]], rules: List[Dict[str, Any]]
+) -> Dict[Tuple[str, str], int]:
+    keys: List[Tuple[str, str]] = []
     seen = set()
-    deduped = []
-    for query in queries:
-        if query not in seen:
-            seen.add(query)
-            deduped.append(query)
-    return deduped
+    for rule in rules:
+        field, patterns = _rule_query_patterns(rule)
+        for pattern in patterns:
+            key = (field, pattern.lower())
+            if field and key not in seen:
+                seen.add(key)
+                keys.append(key)
+    automata = {
+        field: _PatternAutomaton((pattern, i) for i, (f, pattern) in enumerate(keys) if f == field)
+        for field in ("from", "subject")
+    }
+    counts: Counter = Counter()
+    for meta in metas:
+        for field, automaton in automata.items():
+            for index in _iter_bits(automaton.search(_normalize_text(meta.get(field)))):
+                counts[keys[index]] += 1
+    return dict(counts)
+
+
+def _plan_rule_gmail_queries(
+    rules: List[Dict[str, Any]],
+    base_query: str,
+    pattern_yield: Optional[Dict[Tuple[str, str], int]] = None,
+    max_chars: int = GMAIL_QUERY_MAX_CHARS,
+) -> List[Dict[str, Any]]:
+    # Packs every rule's patterns into from:(a OR b ...) / subject:(...) groups no longer
+    # than max_chars, shared across rules. Without yield hints, rule order stands in.
+    terms: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    catch_all: List[str] = []
+    for rule_index, rule in enumerate(rules):
+        field, patterns = _rule_query_patterns(rule)
+        if field is None:
+            catch_all.append(str(rule.get("id")))
+            continue
+        for pattern in patterns:
+            quoted = _quote_gmail_term(pattern)
+            if not quoted:
+                continue
+            term = terms.setdefault(
+                (field, pattern.lower()),
+                {"term": quoted, "rank": (rule_index, len(terms)), "rules": []},
+            )
+            term["rules"].append(str(rule.get("id")))
+    hints = pattern_yield or {}
+
+    groups: List[Dict[str, Any]] = []
+    for field in ("from", "subject"):
+        ordered = sorted(
+            ((key, term) for key, term in terms.items() if key[0] == field),
+            key=lambda item: (-hints.get(item[0], 0), item[1]["rank"]),
+        )
+        current: Optional[Dict[str, Any]] = None
+        for key, term in ordered:
+            # The second term also adds the parentheses, so measure the grouped query itself.
+            grouped = (
+                f"{base_query} {field}:({' OR '.join(current['terms'] + [term['term']])})"
+                if current is not None
+                else None
+            )
+            if grouped is not None and len(grouped) <= max_chars:
+                current["patterns"].append(key[1])
+                current["terms"].append(term["term"])
+                current["query"] = grouped
+            else:
+                current = {
+                    "field": field,
+                    "patterns": [key[1]],
+                    "terms": [term["term"]],
+                    "query": f"{base_query} {field}:{term['term']}",
+                    "rules": [],
+                    "expected_yield": 0,
+                    "rank": term["rank"],
+                }
+                groups.append(current)
+            current["rules"].extend(r for r in term["rules"] if r not in current["rules"])
+            current["expected_yield"] += hints.get(key, 0)
+    groups.sort(key=lambda group: (-group["expected_yield"], group["rank"]))
+    if catch_all or not groups:
+        groups.append(
+            {"field": None, "patterns": [], "terms": [], "query": base_query, "rules": catch_all, "expected_yield": 0}
+        )
+    for group in groups:
+        group.pop("terms")
+        group.pop("rank", None)
+    return groups
+
+
+def _query_plan_report(groups: List[Dict[str, Any]], pattern_yield: Optional[Dict[Tuple[str, str], int]]) -> Dict[str, Any]:
+    return {
+        "yield_source": "mirror" if pattern_yield is not None else "rule_order",
+        "queries": [
+            {
+                "field": group["field"],
+                "patterns": len(group["patterns"]),
+                "rules": len(group["rules"]),
+                "expected_yield": group["expected_yield"],
+            }
+            for group in groups
+        ],
+    }
+
+
+def _mirror_primary_window(
+    mirror: "_MetadataMirror", catalogue: List[Dict[str, Any]], days: int, min_days: int
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    user_label_ids = {label["id"] for label in catalogue if label.get("type") == "user"}
+    now_ms = int(time.time() * 1000)
+    window = mirror.select_window(
+        newer_than_ms=now_ms - days * 86400000,
+        older_than_ms=now_ms - min_days * 86400000 if min_days else None,
+    )
+    primary = [meta for meta in window if not user_label_ids.intersection(meta.get("labelIds") or [])]
+    return window, primary
 
 
 def _parse_csv_arg(raw: str) -> List[str]:
@@ -718,17 +2170,7 @@ def _resolve_snapshot_target_rule_ids(
     return list(RULE_FAMILY_QUEUES[snapshot_queue])
 
 
-def _build_phase10_candidates(
-    label_file: Path,
-    filter_file: Path,
-    apply_limit: int,
-    apply_hours: int,
-    apply_min_hours: int,
-    allow_critical: bool,
-    allow_self_sent_manual: bool,
-    target_rule_ids: Optional[List[str]] = None,
-    snapshot_senders: Optional[List[str]] = None,
-) -> Dict[str, Any]:
+def _load_phase10_policy(label_file: Path, filter_file: Path) -> Dict[str, Any]:
     loaded = _load_and_validate(label_file, filter_file)
     report = loaded["report"]
     plan_fail = bool(
@@ -739,23 +2181,14 @@ def _build_phase10_candidates(
     )
     if plan_fail:
         raise ValueError("policy artifacts have blocking errors; fix before apply")
+    return loaded
 
-    required_env = [
-        "GMAIL_TOKEN_FILE",
-        "GMAIL_CLIENT_SECRET_PATH",
-        "GMAIL_TOKEN_CACHE",
-        "GMAIL_TOKEN_STORE",
-    ]
-    env_state = _collect_required_env(required_env)
-    if env_state["missing"]:
-        raise ValueError(f"missing required env vars: {', '.join(env_state['missing'])}")
-
-    token_file = Path(os.environ["GMAIL_TOKEN_FILE"])
-    token_data = _load_token_artifact(token_file)
-    if _token_expired(token_data):
-        token_data = _refresh_access_token(token_data)
-        _write_token_artifact(token_file, token_data)
 
+def _select_phase10_rules(
+    loaded: Dict[str, Any],
+    allow_critical: bool,
+    target_rule_ids: Optional[List[str]],
+) -> Dict[str, Any]:
     filters_all = [f for f in loaded["filters"].get("filters", []) if isinstance(f, dict) and f.get("enabled")]
     filters_all.sort(key=lambda r: (r.get("priority", 999), r.get("id", "")))
     owner_email = _normalize_email_address(
@@ -769,92 +2202,60 @@ def _build_phase10_candidates(
     selected_rule_ids = [rid for rid in (target_rule_ids or []) if isinstance(rid, str) and rid.strip()]
     if selected_rule_ids:
         selected_rule_id_set = set(selected_rule_ids)
-        known_rule_ids = {
-            rule.get("id")
-            for rule in filters_apply
-            if isinstance(rule, dict) and isinstance(rule.get("id"), str)
-        }
-        unknown_rule_ids = [rid for rid in selected_rule_ids if rid not in known_rule_ids]
-        if unknown_rule_ids:
-            raise ValueError(f"unknown snapshot rule ids: {', '.join(sorted(unknown_rule_ids))}")
-        filters_apply = [rule for rule in filters_apply if rule.get("id") in selected_rule_id_set]
-    else:
-        selected_rule_id_set = set()
-
-    if not filters_apply:
-        raise ValueError("no eligible rules for apply batch")
-
-    label_map = _collect_apply_label_map(token_data, filters_apply)
-    days = max(1, int(math.ceil(apply_hours / 24)))
-    min_days = max(0, int(math.floor(apply_min_hours / 24)))
-    if min_days >= days:
-        raise ValueError("minimum window must be smaller than maximum window")
-    primary_query = _build_time_window_query(days, min_days, require_no_user_labels=True)
-    fallback_query = _build_time_window_query(days, min_days, require_no_user_labels=False)
-    targeted_mode = bool(selected_rule_id_set)
-    targeted_senders = [s.strip() for s in (snapshot_senders or []) if isinstance(s, str) and s.strip()]
-    if targeted_mode:
-        list_max = min(240, max(60, apply_limit * 2))
-        per_query_cap = max(15, min(40, apply_limit))
-    else:
-        list_max = min(600, max(250, apply_limit * 3))
-        per_query_cap = max(25, min(80, apply_limit))
-    query_sequence: List[str] = []
-    message_ids: List[str] = []
-    seen_message_ids = set()
-
-    if targeted_senders:
-        for sender_pattern in targeted_senders:
-            query_part = f"{primary_query} from:{_quote_gmail_term(sender_pattern)}"
-            query_sequence.append(query_part)
-            for message_id in _gmail_list_messages(token_data, query=query_part, max_total=per_query_cap):
-                if message_id in seen_message_ids:
-                    continue
-                seen_message_ids.add(message_id)
-                message_ids.append(message_id)
-                if len(message_ids) >= list_max:
-                    break
-            if len(message_ids) >= list_max:
-                break
+        known_rule_ids = {
+            rule.get("id")
+            for rule in filters_apply
+            if isinstance(rule, dict) and isinstance(rule.get("id"), str)
+        }
+        unknown_rule_ids = [rid for rid in selected_rule_ids if rid not in known_rule_ids]
+        if unknown_rule_ids:
+            raise ValueError(f"unknown snapshot rule ids: {', '.join(sorted(unknown_rule_ids))}")
+        filters_apply = [rule for rule in filters_apply if rule.get("id") in selected_rule_id_set]
     else:
-        for rule in filters_apply:
-            for query_part in _build_rule_gmail_queries(rule, primary_query):
-                query_sequence.append(query_part)
-                for message_id in _gmail_list_messages(token_data, query=query_part, max_total=per_query_cap):
-                    if message_id in seen_message_ids:
-                        continue
-                    seen_message_ids.add(message_id)
-                    message_ids.append(message_id)
-                    if len(message_ids) >= list_max:
-                        break
-                if len(message_ids) >= list_max:
-                    break
-            if len(message_ids) >= list_max:
-                break
+        selected_rule_id_set = set()
 
-    if not targeted_mode and not targeted_senders:
-        for query_part in [primary_query, fallback_query]:
-            if len(message_ids) >= list_max:
-                break
-            query_sequence.append(query_part)
-            for message_id in _gmail_list_messages(token_data, query=query_part, max_total=list_max):
-                if message_id in seen_message_ids:
-                    continue
-                seen_message_ids.add(message_id)
-                message_ids.append(message_id)
-                if len(message_ids) >= list_max:
-                    break
+    if not filters_apply:
+        raise ValueError("no eligible rules for apply batch")
+    return {
+        "filters_all": filters_all,
+        "filters_apply": filters_apply,
+        "owner_email": owner_email,
+        "selected_rule_id_set": selected_rule_id_set,
+    }
+
+
+def _phase10_window_days(apply_hours: int, apply_min_hours: int) -> Tuple[int, int]:
+    days = max(1, int(math.ceil(apply_hours / 24)))
+    min_days = max(0, int(math.floor(apply_min_hours / 24)))
+    if min_days >= days:
+        raise ValueError("minimum window must be smaller than maximum window")
+    return days, min_days
 
+
+def _plan_phase10_candidates(
+    metas: Iterable[Dict[str, Any]],
+    rules: Dict[str, Any],
+    label_map: Dict[str, str],
+    apply_limit: int,
+    allow_critical: bool,
+    allow_self_sent_manual: bool,
+    classified: Optional[List[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]] = None,
+    profiler: Optional[_RuleProfiler] = None,
+) -> Dict[str, Any]:
+    filters_apply = rules["filters_apply"]
+    owner_email = rules["owner_email"]
+    compiled = _compile_rules(rules["filters_all"])
+    precomputed = iter(classified) if classified is not None else None
     candidate_messages = []
     protected_skips = []
     self_sent_skips = []
-    for mid in message_ids:
-        meta = _gmail_get_message_metadata(token_data, mid)
+    for meta in metas:
         sender = meta.get("from", "")
         msg = {"id": meta["id"], "from": sender, "subject": meta.get("subject", "")}
 
-        matches_all = [r for r in filters_all if _simulate_one_rule(r, msg)]
-        selected_all = _select_rules_for_message(matches_all)
+        matches_all, selected_all = next(precomputed) if precomputed is not None else compiled.classify(msg)
+        if profiler is not None:
+            profiler.observe(msg, [r.get("id") for r in selected_all])
         is_self_sent = owner_email and _normalize_email_address(sender) == owner_email
         allow_self_sent = False
         if is_self_sent and allow_self_sent_manual:
@@ -883,8 +2284,8 @@ def _build_phase10_candidates(
             )
             continue
 
-        matches_apply = [r for r in filters_apply if _simulate_one_rule(r, msg)]
-        selected_apply = _select_rules_for_message(matches_apply)
+        matches_apply = _match_subset(matches_all, filters_apply)
+        selected_apply = compiled.select(matches_apply)
         if not selected_apply:
             continue
 
@@ -926,22 +2327,240 @@ def _build_phase10_candidates(
         )
         if len(candidate_messages) >= apply_limit:
             break
+    return {
+        "selected_candidates": len(candidate_messages),
+        "candidate_messages": candidate_messages,
+        "protected_skips": protected_skips,
+        "self_sent_skips": self_sent_skips,
+    }
+
+
+def _build_phase10_candidates(
+    label_file: Path,
+    filter_file: Path,
+    apply_limit: int,
+    apply_hours: int,
+    apply_min_hours: int,
+    allow_critical: bool,
+    allow_self_sent_manual: bool,
+    target_rule_ids: Optional[List[str]] = None,
+    snapshot_senders: Optional[List[str]] = None,
+    concurrency: int = 1,
+    profile: bool = False,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    loaded = _load_phase10_policy(label_file, filter_file)
+
+    required_env = [
+        "GMAIL_TOKEN_FILE",
+        "GMAIL_CLIENT_SECRET_PATH",
+        "GMAIL_TOKEN_CACHE",
+        "GMAIL_TOKEN_STORE",
+    ]
+    env_state = _collect_required_env(required_env)
+    if env_state["missing"]:
+        raise ValueError(f"missing required env vars: {', '.join(env_state['missing'])}")
+
+    token_file = Path(os.environ["GMAIL_TOKEN_FILE"])
+    token_data = _token_manager(token_file).current()
+
+    rules = _select_phase10_rules(loaded, allow_critical, target_rule_ids)
+    filters_apply = rules["filters_apply"]
+    selected_rule_id_set = rules["selected_rule_id_set"]
+
+    label_map = _collect_apply_label_map(token_data, filters_apply)
+    days, min_days = _phase10_window_days(apply_hours, apply_min_hours)
+    primary_query = _build_time_window_query(days, min_days, require_no_user_labels=True)
+    fallback_query = _build_time_window_query(days, min_days, require_no_user_labels=False)
+    targeted_mode = bool(selected_rule_id_set)
+    targeted_senders = [s.strip() for s in (snapshot_senders or []) if isinstance(s, str) and s.strip()]
+    if targeted_mode:
+        list_max = min(240, max(60, apply_limit * 2))
+        per_query_cap = max(15, min(40, apply_limit))
+    else:
+        list_max = min(600, max(250, apply_limit * 3))
+        per_query_cap = max(25, min(80, apply_limit))
+    query_sequence: List[str] = []
+    message_ids: List[str] = []
+    seen_message_ids = set()
+    query_plan: Optional[Dict[str, Any]] = None
+
+    if targeted_senders:
+        planned_queries = [
+            f"{primary_query} from:{_quote_gmail_term(sender_pattern)}" for sender_pattern in targeted_senders
+        ]
+        query_caps = [per_query_cap] * len(planned_queries)
+    else:
+        mirror = _metadata_mirror()
+        catalogue = mirror.label_catalogue() if mirror is not None and mirror.get_meta("full_scan_at") else None
+        pattern_yield = (
+            _mirror_pattern_yield(_mirror_primary_window(mirror, catalogue, days, min_days)[1], filters_apply)
+            if catalogue is not None
+            else None
+        )
+        groups = _plan_rule_gmail_queries(filters_apply, primary_query, pattern_yield=pattern_yield)
+        planned_queries = [group["query"] for group in groups]
+        query_caps = [min(list_max, per_query_cap * max(1, len(group["patterns"]))) for group in groups]
+        query_plan = _query_plan_report(groups, pattern_yield)
+    for query_part, query_ids in _iter_query_message_ids(
+        token_data, planned_queries, concurrency=concurrency, caps=query_caps
+    ):
+        query_sequence.append(query_part)
+        for message_id in query_ids:
+            if message_id in seen_message_ids:
+                continue
+            seen_message_ids.add(message_id)
+            message_ids.append(message_id)
+            if len(message_ids) >= list_max:
+                break
+        if len(message_ids) >= list_max:
+            break
+
+    if not targeted_mode and not targeted_senders:
+        for query_part in [primary_query, fallback_query]:
+            if len(message_ids) >= list_max:
+                break
+            query_sequence.append(query_part)
+            for message_id in _gmail_list_messages(token_data, query=query_part, max_total=list_max):
+                if message_id in seen_message_ids:
+                    continue
+                seen_message_ids.add(message_id)
+                message_ids.append(message_id)
+                if len(message_ids) >= list_max:
+                    break
 
+    profiler = _RuleProfiler(_compile_rules(rules["filters_all"])) if profile else None
+    planned = _plan_phase10_candidates(
+        (
+            meta
+            for _, meta in _iter_message_metadata(token_data, message_ids, concurrency=concurrency, refresh=refresh)
+        ),
+        rules,
+        label_map,
+        apply_limit=apply_limit,
+        allow_critical=allow_critical,
+        allow_self_sent_manual=allow_self_sent_manual,
+        profiler=profiler,
+    )
+    if profiler is not None:
+        planned["rule_profile"] = profiler.report()
+    if query_plan is not None:
+        planned["query_plan"] = query_plan
     return {
         "token_file": token_file,
         "token_data": token_data,
+        "source": "gmail",
         "query": primary_query,
         "query_sequence": query_sequence,
         "target_rule_ids": sorted(selected_rule_id_set),
-        "selected_candidates": len(candidate_messages),
-        "candidate_messages": candidate_messages,
-        "protected_skips": protected_skips,
-        "self_sent_skips": self_sent_skips,
+        **planned,
+    }
+
+
+def _build_phase10_candidates_offline(
+    label_file: Path,
+    filter_file: Path,
+    apply_limit: int,
+    apply_hours: int,
+    apply_min_hours: int,
+    allow_critical: bool,
+    allow_self_sent_manual: bool,
+    target_rule_ids: Optional[List[str]] = None,
+    snapshot_senders: Optional[List[str]] = None,
+    profile: bool = False,
+) -> Dict[str, Any]:
+    # Same selection as _build_phase10_candidates, evaluated against the mirror without network calls.
+    loaded = _load_phase10_policy(label_file, filter_file)
+    mirror = _metadata_mirror()
+    if mirror is None:
+        raise ValueError("metadata mirror is disabled; offline snapshot needs GMAIL_MIRROR_DB")
+    if not mirror.get_meta("full_scan_at"):
+        raise ValueError("metadata mirror has no full scan yet; run --sync first")
+    catalogue = mirror.label_catalogue()
+    if catalogue is None:
+        raise ValueError("metadata mirror has no label catalogue; run --sync first")
+
+    rules = _select_phase10_rules(loaded, allow_critical, target_rule_ids)
+    selected_rule_id_set = rules["selected_rule_id_set"]
+    label_map = {label["name"]: label["id"] for label in catalogue}
+    needed_paths = {
+        path
+        for rule in rules["filters_apply"]
+        for path in rule.get("actions", {}).get("apply_labels", [])
+        if isinstance(path, str) and path
+    }
+    missing_paths = sorted(path for path in needed_paths if path not in label_map)
+    if missing_paths:
+        raise ValueError(f"labels not in mirror catalogue (create them online first): {', '.join(missing_paths)}")
+
+    days, min_days = _phase10_window_days(apply_hours, apply_min_hours)
+    primary_query = _build_time_window_query(days, min_days, require_no_user_labels=True)
+    fallback_query = _build_time_window_query(days, min_days, require_no_user_labels=False)
+    window, primary = _mirror_primary_window(mirror, catalogue, days, min_days)
+    # Online listing walks the planned queries in order; ordering by first matching query keeps the picks aligned.
+    filters_apply = rules["filters_apply"]
+    pattern_yield = _mirror_pattern_yield(primary, filters_apply)
+    groups = _plan_rule_gmail_queries(filters_apply, primary_query, pattern_yield=pattern_yield)
+    group_automata = {
+        field: _PatternAutomaton(
+            (pattern, index)
+            for index, group in enumerate(groups)
+            if group["field"] == field
+            for pattern in group["patterns"]
+        )
+        for field in ("from", "subject")
+    }
+    catch_all_index = next((index for index, group in enumerate(groups) if group["field"] is None), len(groups))
+    classified_by_id = {
+        meta["id"]: classified
+        for meta, classified in zip(window, _compile_rules(rules["filters_all"]).classify_batch(window))
     }
 
+    def _first_query_index(meta: Dict[str, Any]) -> int:
+        mask = 0
+        for field, automaton in group_automata.items():
+            mask |= automaton.search(_normalize_text(meta.get(field)))
+        return min((mask & -mask).bit_length() - 1, catch_all_index) if mask else catch_all_index
 
-def _pattern_match(patterns: Iterable[str], target: str) -> bool:
-    return any(p.lower() in target for p in patterns if isinstance(p, str) and p)
+    primary.sort(key=_first_query_index)
+    targeted_senders = [s.strip() for s in (snapshot_senders or []) if isinstance(s, str) and s.strip()]
+    if targeted_senders:
+        query_sequence = [
+            f"{primary_query} from:{_quote_gmail_term(sender_pattern)}" for sender_pattern in targeted_senders
+        ]
+        needles = [sender_pattern.lower() for sender_pattern in targeted_senders]
+        metas = [meta for meta in primary if any(n in (meta.get("from") or "").lower() for n in needles)]
+    elif selected_rule_id_set:
+        query_sequence = [primary_query]
+        metas = primary
+    else:
+        query_sequence = [primary_query, fallback_query]
+        primary_ids = {meta["id"] for meta in primary}
+        metas = primary + [meta for meta in window if meta["id"] not in primary_ids]
+
+    profiler = _RuleProfiler(_compile_rules(rules["filters_all"])) if profile else None
+    planned = _plan_phase10_candidates(
+        metas,
+        rules,
+        label_map,
+        apply_limit=apply_limit,
+        allow_critical=allow_critical,
+        allow_self_sent_manual=allow_self_sent_manual,
+        classified=[classified_by_id[meta["id"]] for meta in metas],
+        profiler=profiler,
+    )
+    if profiler is not None:
+        planned["rule_profile"] = profiler.report()
+    return {
+        "source": "mirror",
+        "mirror_synced_at": float(mirror.get_meta("synced_at") or 0) or None,
+        "mirror_current": mirror.is_current(),
+        "query": primary_query,
+        "query_sequence": query_sequence,
+        "target_rule_ids": sorted(selected_rule_id_set),
+        **({"query_plan": _query_plan_report(groups, pattern_yield)} if not targeted_senders else {}),
+        **planned,
+    }
 
 
 def _validate_labels(labels_data: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -1460,6 +3079,7 @@ def _run_archive_migrate(
     run_id: str,
     approval_text: str,
     dry_run: bool = False,
+    concurrency: int = 1,
 ) -> Dict[str, Any]:
     if approval_text.strip() != PHASE9_APPROVAL_TEXT:
         raise ValueError("approval text mismatch")
@@ -1483,10 +3103,7 @@ def _run_archive_migrate(
     if env_state["missing"]:
         raise ValueError(f"missing required env vars: {', '.join(env_state['missing'])}")
 
-    token_data = _load_token_artifact(Path(os.environ["GMAIL_TOKEN_FILE"]))
-    if _token_expired(token_data):
-        token_data = _refresh_access_token(token_data)
-        _write_token_artifact(Path(os.environ["GMAIL_TOKEN_FILE"]), token_data)
+    token_data = _token_manager(Path(os.environ["GMAIL_TOKEN_FILE"])).current()
 
     loaded = _load_and_validate(label_file, filter_file)
     plan_fail = bool(
@@ -1499,7 +3116,7 @@ def _run_archive_migrate(
         raise ValueError("policy artifacts have blocking errors; fix before migration")
 
     v3_label_paths = _load_v3_label_paths(label_file)
-    label_objs = _gmail_list_labels_full(token_data)
+    label_objs = _label_catalogue_for(token_data).labels(token_data)
     legacy = _collect_legacy_labels(label_objs, v3_label_paths, migration_scope, archive_root)
     legacy_total = len(legacy)
     legacy_sorted = {k: legacy[k] for k in sorted(legacy)}
@@ -1526,7 +3143,7 @@ def _run_archive_migrate(
             "mapping": mapping_payload,
         }
 
-    existing_labels = _gmail_list_labels(token_data)
+    existing_labels = _label_catalogue_for(token_data).name_map(token_data)
     existing_archives = {
         name: lid
         for name, lid in existing_labels.items()
@@ -1536,9 +3153,7 @@ def _run_archive_migrate(
     needed_archives = [name for name in mapping.values() if name not in existing_labels]
 
     if not dry_run and needed_archives:
-        for name in needed_archives:
-            _gmail_create_label(token_data, name)
-        existing_labels = _gmail_list_labels(token_data)
+        existing_labels = _ensure_labels(token_data, needed_archives)
         existing_archives = {
             name: lid for name, lid in existing_labels.items() if name.startswith(f"{archive_root}/")
         }
@@ -1550,12 +3165,12 @@ def _run_archive_migrate(
     }
 
     message_ids: List[str] = []
-    for legacy_name, legacy_id in sorted(legacy.items(), key=lambda item: item[0]):
-        del legacy_id
-        query = f"label:\"{legacy_name}\""
-        ids = _gmail_list_messages(token_data, query)
-        for mid in ids:
-            if mid not in message_ids:
+    seen_message_ids = set()
+    # Mutations select and decide on live Gmail state; the mirror only serves read-only planning.
+    for legacy_name in sorted(legacy):
+        for mid in _gmail_list_messages(token_data, f"label:\"{legacy_name}\""):
+            if mid not in seen_message_ids:
+                seen_message_ids.add(mid)
                 message_ids.append(mid)
 
     if not message_ids:
@@ -1623,9 +3238,83 @@ def _run_archive_migrate(
     failures: List[Dict[str, Any]] = []
     messages_mutated = 0
 
-    for mid in selected:
+    def _failure_rate_exceeded() -> bool:
+        attempted = messages_mutated + len(failures)
+        return len(failures) / max(1, attempted) > 0.1
+
+    def _interrupted_result() -> Dict[str, Any]:
+        checkpoint.update(
+            {
+                "status": "interrupted",
+                "stage": stage,
+                "messages_scanned": checkpoint.get("messages_scanned", 0) + len(selected),
+                "processed": sorted(processed),
+                "run_messages": message_ids,
+                "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            }
+        )
+        _save_checkpoint(checkpoint_path, checkpoint)
+        return {
+            "status": "fail",
+            "run_id": run_id,
+            "stage": stage,
+            "scope": migration_scope,
+            "legacy_labels_total": legacy_total,
+            "archive_labels_created": len(needed_archives),
+            "messages_scanned": len(selected),
+            "messages_mutated": messages_mutated,
+            "failures": failures,
+            "checkpoint_path": str(checkpoint_path),
+            "journal_path": str(journal_path),
+            "rollback_ready": True,
+            "message": "stopped: failure rate > 10%",
+            "applied_records": applied_records,
+            "mapping": mapping,
+        }
+
+    def _flush_pending_modifies(pending: List[Dict[str, Any]]) -> None:
+        nonlocal messages_mutated
+        outcomes = _run_gmail_calls(
+            token_data,
+            [
+                ("modify_message", _gmail_modify_message, (item["message_id"], item["archive_label_ids"], []))
+                for item in pending
+            ],
+            concurrency,
+            abort_failure_rate=0.1,
+        )
+        for item, (_, exc) in zip(pending, outcomes):
+            if isinstance(exc, CancelledError):
+                continue
+            if exc is not None:
+                failures.append({"message_id": item["message_id"], "error": str(exc)})
+                continue
+            entry = {
+                "message_id": item["message_id"],
+                "from": item["from"],
+                "subject": item["subject"],
+                "legacy_labels": item["legacy_labels"],
+                "archive_label_ids": item["archive_label_ids"],
+                "archive_label_names": item["archive_label_names"],
+                "status": "applied",
+                "legacy_added": [],
+                "archive_added": item["archive_label_ids"],
+                "stage": stage,
+                "run_id": run_id,
+            }
+            _append_journal(journal_path, entry)
+            applied_records.append(entry)
+            messages_mutated += 1
+            processed.add(item["message_id"])
+
+    metadata_errors: Dict[str, str] = {}
+    pending_modifies: List[Dict[str, Any]] = []
+    for mid, metadata in _iter_message_metadata(
+        token_data, selected, errors=metadata_errors, concurrency=concurrency, refresh=True
+    ):
         try:
-            metadata = _gmail_get_message_metadata(token_data, mid)
+            if metadata is None:
+                raise ValueError(metadata_errors.get(mid, f"metadata unavailable: {mid}"))
             current_label_ids = set(metadata.get("labelIds", []))
             matched_legacy: List[str] = [
                 legacy_name for legacy_name, lid in legacy.items() if lid in current_label_ids
@@ -1664,57 +3353,29 @@ def _run_archive_migrate(
                     }
                 )
             else:
-                _gmail_modify_message(token_data, mid, attempted_archive_ids, [])
-                entry = {
-                    "message_id": mid,
-                    "from": metadata.get("from"),
-                    "subject": metadata.get("subject"),
-                    "legacy_labels": matched_legacy,
-                    "archive_label_ids": attempted_archive_ids,
-                    "archive_label_names": add_archive_names,
-                    "status": "applied",
-                    "legacy_added": [],
-                    "archive_added": attempted_archive_ids,
-                    "stage": stage,
-                    "run_id": run_id,
-                }
-                _append_journal(journal_path, entry)
-                applied_records.append(entry)
-                messages_mutated += 1
-                processed.add(mid)
-        except Exception as exc:
-            failures.append({"message_id": mid, "error": str(exc)})
-            attempted = messages_mutated + len(failures)
-            failure_rate = len(failures) / max(1, attempted)
-            if failure_rate > 0.1:
-                checkpoint.update(
+                pending_modifies.append(
                     {
-                        "status": "interrupted",
-                        "stage": stage,
-                        "messages_scanned": checkpoint.get("messages_scanned", 0) + len(selected),
-                        "processed": sorted(processed),
-                        "run_messages": message_ids,
-                        "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+                        "message_id": mid,
+                        "from": metadata.get("from"),
+                        "subject": metadata.get("subject"),
+                        "legacy_labels": matched_legacy,
+                        "archive_label_ids": attempted_archive_ids,
+                        "archive_label_names": add_archive_names,
                     }
                 )
-                _save_checkpoint(checkpoint_path, checkpoint)
-                return {
-                    "status": "fail",
-                    "run_id": run_id,
-                    "stage": stage,
-                    "scope": migration_scope,
-                    "legacy_labels_total": legacy_total,
-                    "archive_labels_created": len(needed_archives),
-                    "messages_scanned": len(selected),
-                    "messages_mutated": messages_mutated,
-                    "failures": failures,
-                    "checkpoint_path": str(checkpoint_path),
-                    "journal_path": str(journal_path),
-                    "rollback_ready": True,
-                    "message": "stopped: failure rate > 10%",
-                    "applied_records": applied_records,
-                    "mapping": mapping,
-                }
+        except Exception as exc:
+            failures.append({"message_id": mid, "error": str(exc)})
+            if _failure_rate_exceeded():
+                return _interrupted_result()
+        if len(pending_modifies) >= max(1, concurrency):
+            _flush_pending_modifies(pending_modifies)
+            pending_modifies = []
+            if _failure_rate_exceeded():
+                return _interrupted_result()
+    if pending_modifies:
+        _flush_pending_modifies(pending_modifies)
+        if _failure_rate_exceeded():
+            return _interrupted_result()
 
     checkpoint.update(
         {
@@ -1740,7 +3401,7 @@ def _run_archive_migrate(
 
     _save_checkpoint(checkpoint_path, checkpoint)
     if not dry_run:
-        _write_token_artifact(Path(os.environ["GMAIL_TOKEN_FILE"]), token_data)
+        _token_manager(Path(os.environ["GMAIL_TOKEN_FILE"])).persist()
     return {
         "status": "ok" if not failures else "warn",
         "run_id": run_id,
@@ -1765,6 +3426,7 @@ def _run_archive_rollback(
     run_id: str,
     checkpoint_file: Path,
     journal_file: Path,
+    bulk: bool = True,
 ) -> Dict[str, Any]:
     resolved_paths = _archive_run_id_output_paths(checkpoint_file, journal_file, run_id)
     checkpoint_path = resolved_paths["checkpoint"]
@@ -1782,10 +3444,7 @@ def _run_archive_rollback(
     if env_state["missing"]:
         raise ValueError(f"missing required env vars: {', '.join(env_state['missing'])}")
 
-    token_data = _load_token_artifact(Path(os.environ["GMAIL_TOKEN_FILE"]))
-    if _token_expired(token_data):
-        token_data = _refresh_access_token(token_data)
-        _write_token_artifact(Path(os.environ["GMAIL_TOKEN_FILE"]), token_data)
+    token_data = _token_manager(Path(os.environ["GMAIL_TOKEN_FILE"])).current()
 
     entries = [e for e in _read_journal(journal_path) if isinstance(e, dict) and e.get("run_id") == run_id]
     applied = [e for e in entries if e.get("status") == "applied"]
@@ -1806,16 +3465,32 @@ def _run_archive_rollback(
 
     failed: List[Dict[str, Any]] = []
     rolled = 0
-    for item in reversed(applied):
-        message_id = item.get("message_id")
-        archive_label_ids = item.get("archive_label_ids", [])
-        if not message_id or not isinstance(archive_label_ids, list):
-            continue
-        try:
-            _gmail_modify_message(token_data, message_id, [], archive_label_ids)
-            rolled += 1
-        except Exception as exc:
-            failed.append({"message_id": message_id, "error": str(exc)})
+    batch_modify_calls = 0
+    if bulk:
+        rolled_result = _rollback_records_batched(
+            token_data,
+            [
+                {"message_id": item["message_id"], "add_label_ids": [], "remove_label_ids": item["archive_label_ids"]}
+                for item in reversed(applied)
+                if item.get("message_id") and isinstance(item.get("archive_label_ids"), list)
+            ],
+            journal_path=journal_path,
+            run_id=run_id,
+        )
+        rolled = len(rolled_result["rolled_back_ids"])
+        failed = rolled_result["failures"]
+        batch_modify_calls = rolled_result["batch_modify_calls"]
+    else:
+        for item in reversed(applied):
+            message_id = item.get("message_id")
+            archive_label_ids = item.get("archive_label_ids", [])
+            if not message_id or not isinstance(archive_label_ids, list):
+                continue
+            try:
+                _gmail_modify_message(token_data, message_id, [], archive_label_ids)
+                rolled += 1
+            except Exception as exc:
+                failed.append({"message_id": message_id, "error": str(exc)})
 
     remaining = len(applied) - rolled
     checkpoint = _load_checkpoint(checkpoint_path)
@@ -1829,8 +3504,10 @@ def _run_archive_rollback(
         "run_id": run_id,
         "checkpoint_path": str(checkpoint_path),
         "journal_path": str(journal_path),
+        "rollback_mode": "bulk" if bulk else "sequential",
         "rolled_back": rolled,
         "rollback_failures": failed,
+        "batch_modify_calls": batch_modify_calls,
         "remaining_impacted_messages": remaining,
     }
 
@@ -1888,23 +3565,333 @@ def _kind_rank_from_label(path: str) -> int:
     return {"SYS": 0, "CNU": 0, "CTX": 1, "AUTO": 2, "GTD": 3}.get(prefix, 3)
 
 
-def _simulate_one_rule(rule: Dict[str, Any], msg: Dict[str, str]) -> bool:
-    from_patterns = [p.lower() for p in rule.get("from_patterns", []) if isinstance(p, str)]
-    subject_patterns = [p.lower() for p in rule.get("subject_patterns", []) if isinstance(p, str)]
-    exclude_patterns = [p.lower() for p in rule.get("exclude_patterns", []) if isinstance(p, str)]
+class _PatternAutomaton:
+    # Aho-Corasick over lowercased substrings; search() ORs together the rule bits of
+    # every pattern occurring in the text, in one pass. search_patterns() is the same
+    # walk over per-pattern bits (positions in self.patterns), used by the profiler.
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        self.patterns = list(patterns)
+        goto: List[Dict[str, int]] = [{}]
+        out: List[int] = [0]
+        hits: List[int] = [0]
+        for ordinal, (pattern, index) in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(0)
+                    hits.append(0)
+                node = nxt
+            out[node] |= 1 << index
+            hits[node] |= 1 << ordinal
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                out[nxt] |= out[fail[nxt]]
+                hits[nxt] |= hits[fail[nxt]]
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        self._hits = hits
+        self.empty = len(goto) == 1
+
+    def search(self, text: str) -> int:
+        return self._walk(text, self._out)
+
+    def search_patterns(self, text: str) -> int:
+        return self._walk(text, self._hits)
+
+    def rule_mask(self, pattern_mask: int) -> int:
+        mask = 0
+        for ordinal in _iter_bits(pattern_mask):
+            mask |= 1 << self.patterns[ordinal][1]
+        return mask
+
+    def _walk(self, text: str, out: List[int]) -> int:
+        found = 0
+        if self.empty:
+            return found
+        goto, fail = self._goto, self._fail
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+
+def _iter_bits(mask: int) -> Iterable[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class _CompiledRules:
+    # Filter list compiled into from/subject/exclude automata. match() keeps the
+    # per-rule semantics: every non-empty pattern list must hit (substring, case-
+    # insensitive) and no exclude pattern may occur in sender or subject.
+    # select() is _select_rules_for_message over precomputed ranks and bitsets,
+    # memoized per matched set.
+    SELECTION_CACHE_MAX = 65536
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = list(rules)
+        self.policy_hash = hashlib.sha256(
+            json.dumps(self.rules, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        self._index = {id(rule): i for i, rule in enumerate(self.rules)}
+        self._selection: Dict[int, Tuple[int, ...]] = {}
+        self._compile_selection()
+        self._all = (1 << len(self.rules)) - 1
+        self._needs_from = 0
+        self._needs_subject = 0
+        has_exclude = 0
+        automata: Dict[str, List[Tuple[str, int]]] = {"from": [], "subject": [], "exclude": []}
+        for index, rule in enumerate(self.rules):
+            for field, key in (("from", "from_patterns"), ("subject", "subject_patterns"), ("exclude", "exclude_patterns")):
+                patterns = [p.lower() for p in rule.get(key, []) if isinstance(p, str)]
+                if field == "from" and patterns:
+                    self._needs_from |= 1 << index
+                if field == "subject" and patterns:
+                    self._needs_subject |= 1 << index
+                if field == "exclude" and any(patterns):
+                    has_exclude |= 1 << index
+                automata[field].extend((p, index) for p in patterns if p)
+        # Rules without subject or exclude patterns are decided by the sender alone.
+        self._sender_only = self._all & ~self._needs_subject & ~has_exclude
+        self._from = _PatternAutomaton(automata["from"])
+        self._subject = _PatternAutomaton(automata["subject"])
+        self._exclude = _PatternAutomaton(automata["exclude"])
+
+    def _compile_selection(self) -> None:
+        rules = self.rules
+        try:
+            order = sorted(range(len(rules)), key=cmp_to_key(lambda a, b: _compare_rules(rules[a], rules[b])))
+        except (KeyError, TypeError):
+            # Rules without priority/id cannot be ranked up front; select() falls back to the cmp path.
+            self._ranks: Optional[List[int]] = None
+            return
+        ranks = [0] * len(rules)
+        for pos, index in enumerate(order):
+            if pos and _compare_rules(rules[order[pos - 1]], rules[index]) == 0:
+                ranks[index] = ranks[order[pos - 1]]
+            else:
+                ranks[index] = pos
+        self._ranks = ranks
+        self._better = [
+            sum(1 << j for j in range(len(rules)) if ranks[j] < ranks[i]) for i in range(len(rules))
+        ]
+        id_masks: Dict[Any, int] = defaultdict(int)
+        group_masks: Dict[Any, int] = defaultdict(int)
+        for index, rule in enumerate(rules):
+            id_masks[rule["id"]] |= 1 << index
+            if rule.get("mutual_exclusive_group") is not None:
+                group_masks[rule["mutual_exclusive_group"]] |= 1 << index
+        self._group_masks = list(group_masks.values())
+        self._conflicts = [
+            sum(id_masks.get(cid, 0) for cid in set(rule.get("conflict_with", []))) for rule in rules
+        ]
+
+    def _resolve(self, mask: int) -> Tuple[int, ...]:
+        cached = self._selection.get(mask)
+        if cached is not None:
+            return cached
+        ranks = self._ranks or []
+        selected = mask
+        for group_mask in self._group_masks:
+            members = mask & group_mask
+            if members & (members - 1):
+                best = min(_iter_bits(members), key=lambda i: (ranks[i], i))
+                selected &= ~(members & ~(1 << best))
+        cached = tuple(i for i in _iter_bits(selected) if not selected & self._conflicts[i] & self._better[i])
+        if len(self._selection) >= self.SELECTION_CACHE_MAX:
+            self._selection.clear()
+        self._selection[mask] = cached
+        return cached
+
+    def select(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not matches:
+            return []
+        if self._ranks is None:
+            return _select_rules_for_message(matches)
+        mask = 0
+        last = -1
+        for rule in matches:
+            index = self._index.get(id(rule))
+            if index is None or index <= last:
+                return _select_rules_for_message(matches)
+            mask |= 1 << index
+            last = index
+        return [self.rules[i] for i in self._resolve(mask)]
+
+    def _sender_stage(self, sender: str) -> Tuple[int, int]:
+        from_ok = self._all & ~(self._needs_from & ~self._from.search(sender))
+        pending = from_ok & ~self._sender_only & ~self._exclude.search(sender)
+        return from_ok & self._sender_only, pending
+
+    def _subject_stage(self, pending: int, subject: str) -> int:
+        subject_ok = ~(self._needs_subject & ~self._subject.search(subject))
+        return pending & subject_ok & ~self._exclude.search(subject)
+
+    def _match_mask(self, sender: str, subject: str) -> int:
+        cache = _CLASSIFICATION_CACHE
+        stage = cache.get((self.policy_hash, sender))
+        if stage is None:
+            stage = self._sender_stage(sender)
+            cache.put((self.policy_hash, sender), stage)
+            if not stage[1]:
+                cache.stats["misses"] += 1
+                return stage[0]
+        else:
+            cache.stats["sender_stage_hits"] += 1
+        sender_matches, pending = stage
+        if not pending:
+            cache.stats["hits"] += 1
+            cache.stats["sender_decided"] += 1
+            return sender_matches
+        key = (self.policy_hash, sender, subject)
+        mask = cache.get(key)
+        if mask is None:
+            cache.stats["misses"] += 1
+            mask = sender_matches | self._subject_stage(pending, subject)
+            cache.put(key, mask)
+        else:
+            cache.stats["hits"] += 1
+        return mask
+
+    def explain(self, sender: str, subject: str) -> Tuple[int, int, Dict[str, int]]:
+        # Uncached profiling pass: the matched mask comes from the same sender/subject
+        # stages as _match_mask, the per-pattern hits from the same automata. Rules whose
+        # from/subject patterns hit but are not matched were dropped by an exclude.
+        sender_matches, pending = self._sender_stage(sender)
+        matched = sender_matches | (self._subject_stage(pending, subject) if pending else 0)
+        hits = {
+            "from": self._from.search_patterns(sender),
+            "subject": self._subject.search_patterns(subject),
+            "exclude": self._exclude.search_patterns(sender) | self._exclude.search_patterns(subject),
+        }
+        targeted = (
+            self._all
+            & ~(self._needs_from & ~self._from.rule_mask(hits["from"]))
+            & ~(self._needs_subject & ~self._subject.rule_mask(hits["subject"]))
+        )
+        return matched, targeted & ~matched, hits
 
-    sender = _normalize_text(msg.get("from"))
-    subject = _normalize_text(msg.get("subject"))
+    def match(self, msg: Dict[str, Any]) -> List[Dict[str, Any]]:
+        mask = self._match_mask(_normalize_text(msg.get("from")), _normalize_text(msg.get("subject")))
+        return [self.rules[i] for i in _iter_bits(mask)]
 
-    from_ok = _pattern_match(from_patterns, sender) if from_patterns else True
-    subject_ok = _pattern_match(subject_patterns, subject) if subject_patterns else True
-    target_ok = from_ok and subject_ok
-    if not target_ok:
-        return False
+    def _classify_mask(self, mask: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        matches = [self.rules[i] for i in _iter_bits(mask)]
+        if self._ranks is None:
+            return matches, _select_rules_for_message(matches)
+        return matches, [self.rules[i] for i in self._resolve(mask)]
+
+    def classify(self, msg: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        return self._classify_mask(
+            self._match_mask(_normalize_text(msg.get("from")), _normalize_text(msg.get("subject")))
+        )
+
+    def classify_batch(
+        self, messages: List[Dict[str, Any]]
+    ) -> List[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        # Whole-corpus path: each distinct sender and subject runs through the automata
+        # once, each row's match mask is a few bitwise ops over those columns, and each
+        # distinct mask is resolved once. Bypasses the LRU so a bulk pass does not evict it.
+        senders = [_normalize_text(msg.get("from")) for msg in messages]
+        subjects = [_normalize_text(msg.get("subject")) for msg in messages]
+        sender_stage = {sender: self._sender_stage(sender) for sender in set(senders)}
+        subject_hits: Dict[str, Tuple[int, int]] = {}
+        masks: List[int] = []
+        for sender, subject in zip(senders, subjects):
+            sender_matches, pending = sender_stage[sender]
+            if pending:
+                hits = subject_hits.get(subject)
+                if hits is None:
+                    hits = (self._subject.search(subject), self._exclude.search(subject))
+                    subject_hits[subject] = hits
+                sender_matches |= pending & ~(self._needs_subject & ~hits[0]) & ~hits[1]
+            masks.append(sender_matches)
+        resolved = {mask: self._classify_mask(mask) for mask in set(masks)}
+        return [resolved[mask] for mask in masks]
+
+
+class _ClassificationCache:
+    # Shared LRU for rule matching. Keys start with the compiled policy hash:
+    # (hash, sender) holds the sender-stage masks and (hash, sender, subject) the full
+    # match mask, so repeat senders skip the automata entirely.
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.stats = Counter()
+        self._entries: "OrderedDict[Tuple[Any, ...], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[Any, ...]) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple[Any, ...], value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            stats, self.stats = self.stats, Counter()
+            entries = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        if not lookups:
+            return {}
+        return {
+            "entries": entries,
+            "hit_rate": round(stats["hits"] / lookups, 4),
+            **dict(sorted(stats.items())),
+        }
+
+
+_CLASSIFICATION_CACHE = _ClassificationCache(int(os.getenv("GMAIL_CLASSIFY_CACHE_SIZE", "100000")))
 
-    if _pattern_match(exclude_patterns, sender) or _pattern_match(exclude_patterns, subject):
-        return False
-    return True
+
+_COMPILED_RULES: Dict[Tuple[int, ...], _CompiledRules] = {}
+_COMPILED_RULES_LOCK = threading.Lock()
+
+
+def _compile_rules(rules: List[Dict[str, Any]]) -> _CompiledRules:
+    # Keyed by rule identity; the cached entry holds the dicts, so ids cannot be reused.
+    key = tuple(id(rule) for rule in rules)
+    with _COMPILED_RULES_LOCK:
+        compiled = _COMPILED_RULES.get(key)
+        if compiled is None:
+            compiled = _CompiledRules(rules)
+            _COMPILED_RULES[key] = compiled
+        return compiled
+
+
+def _match_subset(matches: List[Dict[str, Any]], subset: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    subset_ids = {id(rule) for rule in subset}
+    return [rule for rule in matches if id(rule) in subset_ids]
 
 
 def _compare_rules(rule_a: Dict[str, Any], rule_b: Dict[str, Any]) -> int:
@@ -1980,40 +3967,262 @@ def _select_rules_for_message(matches: List[Dict[str, Any]]) -> List[Dict[str, A
     return conflict_filtered
 
 
-def _simulate(filters: List[Dict[str, Any]], messages: List[Dict[str, str]]) -> Dict[str, Any]:
+def _compile_enabled_rules(filters: List[Dict[str, Any]]) -> _CompiledRules:
     enabled_rules = [f for f in filters if isinstance(f, dict) and f.get("enabled", False)]
     enabled_rules.sort(key=lambda r: (r.get("priority", 999), r.get("id", "")))
+    return _compile_rules(enabled_rules)
+
+
+class _RuleProfiler:
+    # Opt-in (--profile-rules) accounting over the compiled matcher: matched/excluded
+    # come from _CompiledRules.explain() rule masks and pattern hits from the automata,
+    # so the profile cannot drift from classification. Runs an extra uncached automata
+    # pass per message; never enabled by default.
+    FIELDS = ("from", "subject", "exclude")
+
+    def __init__(self, compiled: _CompiledRules):
+        self.compiled = compiled
+        self.automata = {"from": compiled._from, "subject": compiled._subject, "exclude": compiled._exclude}
+        self.messages = 0
+        self.rule_stats: List[Counter] = [Counter() for _ in compiled.rules]
+        self.pattern_hits: Counter = Counter()
+
+    def observe(self, msg: Dict[str, Any], selected_ids: Iterable[str]) -> None:
+        self.messages += 1
+        matched, excluded, hits = self.compiled.explain(
+            _normalize_text(msg.get("from")), _normalize_text(msg.get("subject"))
+        )
+        for field, pattern_mask in hits.items():
+            for ordinal in _iter_bits(pattern_mask):
+                self.pattern_hits[(field, ordinal)] += 1
+        for index in _iter_bits(excluded):
+            self.rule_stats[index]["excluded"] += 1
+        selected = set(selected_ids)
+        for index in _iter_bits(matched):
+            stats = self.rule_stats[index]
+            stats["matched"] += 1
+            if self.compiled.rules[index].get("id") in selected:
+                stats["selected"] += 1
+            else:
+                stats["selection_losses"] += 1
+
+    def report(self, top: int = 20) -> Dict[str, Any]:
+        rules = self.compiled.rules
+        all_patterns = [
+            (field, ordinal, index, pattern)
+            for field in self.FIELDS
+            for ordinal, (pattern, index) in enumerate(self.automata[field].patterns)
+        ]
+        dead = [key for key in all_patterns if not self.pattern_hits.get(key[:2])]
+        patterns_by_rule = Counter(index for _, _, index, _ in all_patterns)
+        dead_by_rule = Counter(index for _, _, index, _ in dead)
+        rules_report = [
+            {
+                "id": rule.get("id"),
+                "matched": self.rule_stats[index]["matched"],
+                "selected": self.rule_stats[index]["selected"],
+                "selection_losses": self.rule_stats[index]["selection_losses"],
+                "excluded": self.rule_stats[index]["excluded"],
+                "patterns": patterns_by_rule.get(index, 0),
+                "dead_patterns": dead_by_rule.get(index, 0),
+            }
+            for index, rule in enumerate(rules)
+        ]
+        rules_report.sort(key=lambda item: (-item["matched"], -item["excluded"], str(item["id"])))
+        top_patterns = sorted(
+            (
+                (hits, field, ordinal, *self.automata[field].patterns[ordinal])
+                for (field, ordinal), hits in self.pattern_hits.items()
+            ),
+            key=lambda item: (-item[0], str(rules[item[4]].get("id")), item[1], item[3]),
+        )[:top]
+        return {
+            "messages": self.messages,
+            "rules": rules_report,
+            "patterns": {"total": len(all_patterns), "hit": len(all_patterns) - len(dead), "dead": len(dead)},
+            "top_patterns": [
+                {"rule_id": rules[index].get("id"), "field": field, "pattern": pattern, "hits": hits}
+                for hits, field, _, pattern, index in top_patterns
+            ],
+            "dead_patterns": [
+                {"rule_id": rules[index].get("id"), "field": field, "pattern": pattern}
+                for field, _, index, pattern in dead
+            ],
+        }
 
-    results = []
-    for msg in messages:
-        matches = []
-        for rule in enabled_rules:
-            if _simulate_one_rule(rule, msg):
-                matches.append(rule)
-        conflict_filtered = _select_rules_for_message(matches)
 
-        labels = []
-        for rule in conflict_filtered:
-            labels.extend(rule.get("actions", {}).get("apply_labels", []))
-        labels = sorted(set(labels))
+def _simulation_result(msg: Dict[str, Any], conflict_filtered: List[Dict[str, Any]]) -> Dict[str, Any]:
+    labels = []
+    for rule in conflict_filtered:
+        labels.extend(rule.get("actions", {}).get("apply_labels", []))
+    labels = sorted(set(labels))
+    return {
+        "message_key": msg.get("id") or msg.get("message_id") or msg.get("subject", ""),
+        "from": msg.get("from"),
+        "subject": msg.get("subject"),
+        "matched_rules": [r["id"] for r in conflict_filtered],
+        "labels": labels,
+        "skip_inbox": any(
+            bool(r.get("actions", {}).get("skip_inbox", False))
+            for r in conflict_filtered
+        ),
+    }
 
-        results.append(
-            {
-                "message_key": msg.get("id") or msg.get("message_id") or msg.get("subject", ""),
-                "from": msg.get("from"),
-                "subject": msg.get("subject"),
-                "matched_rules": [r["id"] for r in conflict_filtered],
-                "labels": labels,
-                "skip_inbox": any(
-                    bool(r.get("actions", {}).get("skip_inbox", False))
-                    for r in conflict_filtered
-                ),
-            }
-        )
 
+_WORKER_COMPILED: Optional[_CompiledRules] = None
+
+
+def _simulation_worker_init(filters: List[Dict[str, Any]]) -> None:
+    global _WORKER_COMPILED
+    _WORKER_COMPILED = _compile_enabled_rules(filters)
+
+
+def _simulation_worker_chunk(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    compiled = _WORKER_COMPILED
+    if compiled is None:
+        raise ValueError("simulation worker used before initialization")
+    return [
+        _simulation_result(msg, conflict_filtered)
+        for msg, (_, conflict_filtered) in zip(messages, compiled.classify_batch(messages))
+    ]
+
+
+def _iter_chunks(items: Iterable[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _simulate_sharded(
+    filters: List[Dict[str, Any]],
+    messages: Iterable[Dict[str, Any]],
+    workers: int,
+    chunk_size: int,
+) -> Iterable[Dict[str, Any]]:
+    # Chunks go to a process pool whose workers compile the policy once; results are
+    # yielded in input order with at most 2 chunks per worker in flight.
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_simulation_worker_init, initargs=(filters,)
+    ) as executor:
+        pending: deque = deque()
+        for chunk in _iter_chunks(messages, chunk_size):
+            pending.append(executor.submit(_simulation_worker_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _simulate(
+    filters: List[Dict[str, Any]],
+    messages: List[Dict[str, str]],
+    workers: int = 1,
+    profiler: Optional[_RuleProfiler] = None,
+) -> Dict[str, Any]:
+    if workers > 1 and len(messages) > DRY_RUN_STREAM_BATCH:
+        chunk_size = max(DRY_RUN_STREAM_BATCH, math.ceil(len(messages) / (workers * 4)))
+        results = list(_simulate_sharded(filters, messages, workers, chunk_size))
+    else:
+        compiled = _compile_enabled_rules(filters)
+        results = [
+            _simulation_result(msg, conflict_filtered)
+            for msg, (_, conflict_filtered) in zip(messages, compiled.classify_batch(messages))
+        ]
+    if profiler is not None:
+        for msg, result in zip(messages, results):
+            profiler.observe(msg, result["matched_rules"])
     return {"processed": len(messages), "results": results}
 
 
+def _iter_ndjson_messages(path: str, invalid: List[int]) -> Iterable[Dict[str, Any]]:
+    handle = sys.stdin if path == "-" else Path(path).open("r", encoding="utf-8")
+    try:
+        for line_no, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                item = None
+            if not isinstance(item, dict):
+                invalid.append(line_no)
+                continue
+            yield item
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def _simulate_stream(
+    filters: List[Dict[str, Any]],
+    messages: Iterable[Dict[str, Any]],
+    batch_size: int = DRY_RUN_STREAM_BATCH,
+    workers: int = 1,
+) -> Iterable[Dict[str, Any]]:
+    if workers > 1:
+        yield from _simulate_sharded(filters, messages, workers, batch_size)
+        return
+    compiled = _compile_enabled_rules(filters)
+    for batch in _iter_chunks(messages, batch_size):
+        for item, (_, conflict_filtered) in zip(batch, compiled.classify_batch(batch)):
+            yield _simulation_result(item, conflict_filtered)
+
+
+def _run_dry_run_stream(
+    filter_file: Path,
+    sample: str,
+    output: str,
+    workers: int = 1,
+    profile: bool = False,
+) -> Dict[str, Any]:
+    # NDJSON in, NDJSON out: one result line per message; only the counters below grow with the rule count.
+    filters = _read_json(filter_file).get("filters", [])
+    profiler = _RuleProfiler(_compile_enabled_rules(filters)) if profile else None
+    invalid_lines: List[int] = []
+    rule_hits: Counter = Counter()
+    label_hits: Counter = Counter()
+    processed = matched = skip_inbox = 0
+    handle = sys.stdout if output == "-" else Path(output).open("w", encoding="utf-8")
+    try:
+        for result in _simulate_stream(filters, _iter_ndjson_messages(sample, invalid_lines), workers=workers):
+            handle.write(json.dumps(result, ensure_ascii=False, sort_keys=True) + "\n")
+            if profiler is not None:
+                profiler.observe(result, result["matched_rules"])
+            processed += 1
+            if result["matched_rules"]:
+                matched += 1
+            rule_hits.update(result["matched_rules"])
+            label_hits.update(result["labels"])
+            skip_inbox += bool(result["skip_inbox"])
+    finally:
+        if handle is sys.stdout:
+            handle.flush()
+        else:
+            handle.close()
+    summary = {
+        "status": "ok" if not invalid_lines else "warn",
+        "sample": sample,
+        "output": output,
+        "workers": workers,
+        "processed": processed,
+        "matched": matched,
+        "unmatched": processed - matched,
+        "skip_inbox": skip_inbox,
+        "rule_hits": dict(sorted(rule_hits.items())),
+        "label_hits": dict(sorted(label_hits.items())),
+        "invalid_lines": len(invalid_lines),
+        "invalid_line_numbers": invalid_lines[:20],
+    }
+    if profiler is not None:
+        summary["rule_profile"] = profiler.report()
+    return summary
+
+
 def _run_apply_pilot(
     label_file: Path,
     filter_file: Path,
@@ -2051,10 +4260,7 @@ def _run_apply_pilot(
         raise ValueError(f"missing required env vars: {', '.join(env_state['missing'])}")
 
     token_file = Path(os.environ["GMAIL_TOKEN_FILE"])
-    token_data = _load_token_artifact(token_file)
-    if _token_expired(token_data):
-        token_data = _refresh_access_token(token_data)
-        _write_token_artifact(token_file, token_data)
+    token_data = _token_manager(token_file).current()
 
     filters_all = [f for f in loaded["filters"].get("filters", []) if isinstance(f, dict) and f.get("enabled")]
     filters_all.sort(key=lambda r: (r.get("priority", 999), r.get("id", "")))
@@ -2084,21 +4290,15 @@ def _run_apply_pilot(
         for p in rule.get("actions", {}).get("apply_labels", []):
             if isinstance(p, str) and p:
                 needed_paths.add(p)
-    label_map = _gmail_list_labels(token_data)
-    missing_paths = [p for p in sorted(needed_paths, key=lambda x: x.count("/")) if p not in label_map]
-    for path in missing_paths:
-        _gmail_create_label(token_data, path)
-    if missing_paths:
-        label_map = _gmail_list_labels(token_data)
+    label_map = _ensure_labels(token_data, needed_paths)
 
+    compiled = _compile_rules(filters_all)
     candidate_messages = []
     protected_skips = []
-    for mid in message_ids:
-        meta = _gmail_get_message_metadata(token_data, mid)
+    for _, meta in _iter_message_metadata(token_data, message_ids, refresh=True):
         msg = {"id": meta["id"], "from": meta.get("from", ""), "subject": meta.get("subject", "")}
 
-        matches_all = [r for r in filters_all if _simulate_one_rule(r, msg)]
-        selected_all = _select_rules_for_message(matches_all)
+        matches_all, selected_all = compiled.classify(msg)
 
         if (not allow_critical) and any(_is_critical_rule(r) for r in selected_all):
             protected_skips.append(
@@ -2111,8 +4311,8 @@ def _run_apply_pilot(
             )
             continue
 
-        matches_apply = [r for r in filters_apply if _simulate_one_rule(r, msg)]
-        selected_apply = _select_rules_for_message(matches_apply)
+        matches_apply = _match_subset(matches_all, filters_apply)
+        selected_apply = compiled.select(matches_apply)
         if not selected_apply:
             continue
         candidate_messages.append({"meta": meta, "selected_rules": selected_apply})
@@ -2125,7 +4325,7 @@ def _run_apply_pilot(
         )
 
     applied_records = []
-    failures = []
+    pending_records = []
     for item in candidate_messages:
         meta = item["meta"]
         selected_rules = item["selected_rules"]
@@ -2166,51 +4366,49 @@ def _run_apply_pilot(
             )
             continue
 
-        try:
-            _gmail_modify_message(token_data, meta["id"], add_final, remove_final)
-            applied_records.append(
+        pending_records.append(
+            {
+                "message_id": meta["id"],
+                "from": meta.get("from"),
+                "subject": meta.get("subject"),
+                "matched_rules": [r.get("id") for r in selected_rules],
+                "add_label_ids": add_final,
+                "remove_label_ids": remove_final,
+            }
+        )
+
+    applied = _apply_records_batched(token_data, pending_records)
+    applied_records.extend(applied["applied_records"])
+    failures = applied["failures"]
+    if applied["aborted"]:
+        done_records = [r for r in applied_records if r.get("status") == "applied"]
+        rolled = _rollback_records_batched(
+            token_data,
+            [
                 {
-                    "message_id": meta["id"],
-                    "from": meta.get("from"),
-                    "subject": meta.get("subject"),
-                    "matched_rules": [r.get("id") for r in selected_rules],
-                    "add_label_ids": add_final,
-                    "remove_label_ids": remove_final,
-                    "status": "applied",
-                }
-            )
-        except Exception as exc:
-            failures.append({"message_id": meta["id"], "error": str(exc)})
-            attempted = len([r for r in applied_records if r.get("status") in {"applied", "noop"}]) + len(failures)
-            failure_rate = len(failures) / max(1, attempted)
-            if failure_rate > 0.10:
-                rollback_errors = []
-                for done in reversed([r for r in applied_records if r.get("status") == "applied"]):
-                    try:
-                        _gmail_modify_message(
-                            token_data,
-                            done["message_id"],
-                            done.get("remove_label_ids", []),
-                            done.get("add_label_ids", []),
-                        )
-                        done["rollback"] = "ok"
-                    except Exception as rb_exc:
-                        done["rollback"] = "fail"
-                        rollback_errors.append(
-                            {"message_id": done["message_id"], "error": str(rb_exc)}
-                        )
-                return {
-                    "status": "fail",
-                    "query": query,
-                    "limit": pilot_limit,
-                    "applied_records": applied_records,
-                    "protected_skips": protected_skips,
-                    "failures": failures,
-                    "rollback_errors": rollback_errors,
-                    "message": "stopped: failure rate > 10%, rollback executed",
+                    "message_id": done["message_id"],
+                    "add_label_ids": done.get("remove_label_ids", []),
+                    "remove_label_ids": done.get("add_label_ids", []),
                 }
+                for done in reversed(done_records)
+            ],
+        )
+        rolled_ids = set(rolled["rolled_back_ids"])
+        for done in done_records:
+            done["rollback"] = "ok" if done["message_id"] in rolled_ids else "fail"
+        rollback_errors = rolled["failures"]
+        return {
+            "status": "fail",
+            "query": query,
+            "limit": pilot_limit,
+            "applied_records": applied_records,
+            "protected_skips": protected_skips,
+            "failures": failures,
+            "rollback_errors": rollback_errors,
+            "message": "stopped: failure rate > 10%, rollback executed",
+        }
 
-    _write_token_artifact(token_file, token_data)
+    _token_manager(token_file).persist()
     return {
         "status": "ok",
         "query": query,
@@ -2233,13 +4431,156 @@ def _collect_apply_label_map(
         for path in rule.get("actions", {}).get("apply_labels", []):
             if isinstance(path, str) and path:
                 needed_paths.add(path)
-    label_map = _gmail_list_labels(token_data)
-    missing_paths = [p for p in sorted(needed_paths, key=lambda x: x.count("/")) if p not in label_map]
-    for path in missing_paths:
-        _gmail_create_label(token_data, path)
-    if missing_paths:
-        label_map = _gmail_list_labels(token_data)
-    return label_map
+    return _ensure_labels(token_data, needed_paths)
+
+
+def _group_records_by_label_delta(
+    records: List[Dict[str, Any]],
+) -> List[Tuple[Tuple[str, ...], Tuple[str, ...], List[Dict[str, Any]]]]:
+    groups: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], List[Dict[str, Any]]] = {}
+    for record in records:
+        key = (
+            tuple(sorted(record.get("add_label_ids", []) or [])),
+            tuple(sorted(record.get("remove_label_ids", []) or [])),
+        )
+        groups.setdefault(key, []).append(record)
+    return [(add, remove, items) for (add, remove), items in groups.items()]
+
+
+def _batch_modify_with_fallback(
+    token_data: Dict[str, Any],
+    message_ids: List[str],
+    add_label_ids: List[str],
+    remove_label_ids: List[str],
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    # A rejected chunk is retried id by id below, and ids that no longer exist are reported
+    # as failures there; neither needs a dead-letter record.
+    try:
+        _gmail_batch_modify_messages(
+            token_data, message_ids, add_label_ids, remove_label_ids, expected_status=(400, 404)
+        )
+        return list(message_ids), []
+    except Exception:
+        pass
+    # Fall back to per-message modify so one bad id does not fail the whole chunk.
+    done: List[str] = []
+    failures: List[Dict[str, Any]] = []
+    for message_id in message_ids:
+        try:
+            _gmail_modify_message(token_data, message_id, add_label_ids, remove_label_ids, expected_status=(404,))
+            done.append(message_id)
+        except Exception as exc:
+            failures.append({"message_id": message_id, "error": str(exc)})
+    return done, failures
+
+
+def _apply_records_batched(
+    token_data: Dict[str, Any],
+    records: List[Dict[str, Any]],
+    journal_path: Optional[Path] = None,
+    max_failure_rate: float = 0.10,
+    concurrency: int = 1,
+) -> Dict[str, Any]:
+    applied_records: List[Dict[str, Any]] = []
+    failures: List[Dict[str, Any]] = []
+    chunks = [
+        (add, remove, group[start : start + GMAIL_BATCH_MODIFY_MAX_IDS])
+        for add, remove, group in _group_records_by_label_delta(records)
+        for start in range(0, len(group), GMAIL_BATCH_MODIFY_MAX_IDS)
+    ]
+    batch_calls = 0
+    window = max(1, concurrency)
+    for start in range(0, len(chunks), window):
+        batch = chunks[start : start + window]
+        outcomes = _run_gmail_calls(
+            token_data,
+            [
+                (
+                    "batch_modify",
+                    _batch_modify_with_fallback,
+                    ([r["message_id"] for r in chunk], list(add), list(remove)),
+                )
+                for add, remove, chunk in batch
+            ],
+            concurrency,
+        )
+        for (add, remove, chunk), (outcome, exc) in zip(batch, outcomes):
+            batch_calls += 1
+            if exc is not None:
+                raise exc
+            done_ids, chunk_failures = outcome
+            failures.extend(chunk_failures)
+            done_set = set(done_ids)
+            done = [r for r in chunk if r["message_id"] in done_set]
+            applied_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+            for record in done:
+                record["status"] = "applied"
+                record["applied_at"] = applied_at
+            applied_records.extend(done)
+            if journal_path is not None:
+                _append_jsonl_rows(journal_path, done)
+        if failures and len(failures) / max(1, len(applied_records) + len(failures)) > max_failure_rate:
+            return {
+                "applied_records": applied_records,
+                "failures": failures,
+                "batch_modify_calls": batch_calls,
+                "aborted": True,
+            }
+    return {
+        "applied_records": applied_records,
+        "failures": failures,
+        "batch_modify_calls": batch_calls,
+        "aborted": False,
+    }
+
+
+def _rollback_records_batched(
+    token_data: Dict[str, Any],
+    records: List[Dict[str, Any]],
+    journal_path: Optional[Path] = None,
+    run_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    # records are inverse deltas in replay order; a message that appears more than once is
+    # split into later waves so its inverses are still applied newest-first.
+    waves: List[List[Dict[str, Any]]] = []
+    occurrences: Counter = Counter()
+    for record in records:
+        wave = occurrences[record["message_id"]]
+        occurrences[record["message_id"]] += 1
+        while len(waves) <= wave:
+            waves.append([])
+        waves[wave].append(record)
+
+    rolled_back_ids: List[str] = []
+    failures: List[Dict[str, Any]] = []
+    chunks: List[Dict[str, Any]] = []
+    for wave in waves:
+        for add, remove, group in _group_records_by_label_delta(wave):
+            for start in range(0, len(group), GMAIL_BATCH_MODIFY_MAX_IDS):
+                chunk_ids = [r["message_id"] for r in group[start : start + GMAIL_BATCH_MODIFY_MAX_IDS]]
+                done_ids, chunk_failures = _batch_modify_with_fallback(token_data, chunk_ids, list(add), list(remove))
+                rolled_back_ids.extend(done_ids)
+                failures.extend(chunk_failures)
+                chunk = {
+                    "run_id": run_id,
+                    "status": "rollback_chunk",
+                    "chunk_index": len(chunks),
+                    "add_label_ids": list(add),
+                    "remove_label_ids": list(remove),
+                    "message_ids": chunk_ids,
+                    "rolled_back": len(done_ids),
+                    "failed_message_ids": [f["message_id"] for f in chunk_failures],
+                    "result": "ok" if not chunk_failures else ("partial" if done_ids else "fail"),
+                    "recorded_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+                }
+                chunks.append(chunk)
+                if journal_path is not None:
+                    _append_jsonl(journal_path, chunk)
+    return {
+        "rolled_back_ids": rolled_back_ids,
+        "failures": failures,
+        "batch_modify_calls": len(chunks),
+    }
 
 
 def _run_apply_batch(
@@ -2253,6 +4594,7 @@ def _run_apply_batch(
     dry_run: bool,
     journal_file: Optional[Path],
     run_id: Optional[str],
+    concurrency: int = 1,
 ) -> Dict[str, Any]:
     if approval_text.strip() != PHASE10_APPLY_APPROVAL_TEXT:
         raise ValueError("approval text mismatch")
@@ -2270,6 +4612,9 @@ def _run_apply_batch(
         apply_min_hours=0,
         allow_critical=allow_critical,
         allow_self_sent_manual=allow_self_sent_manual,
+        concurrency=concurrency,
+        # Label deltas and journal rows are derived from labelIds, so read them live.
+        refresh=True,
     )
     token_file = built["token_file"]
     token_data = built["token_data"]
@@ -2294,84 +4639,76 @@ def _run_apply_batch(
         }
 
     applied_records = []
-    failures = []
+    pending_records = []
     for item in candidate_messages:
-        add_final = item["planned_add_label_ids"]
-        remove_final = item["planned_remove_label_ids"]
-
+        record = {
+            "message_id": item["message_id"],
+            "from": item.get("from"),
+            "subject": item.get("subject"),
+            "matched_rules": item["matched_rules"],
+            "add_label_ids": item["planned_add_label_ids"],
+            "remove_label_ids": item["planned_remove_label_ids"],
+        }
         if dry_run:
-            applied_records.append(
+            record["status"] = "planned"
+            applied_records.append(record)
+        else:
+            pending_records.append({"run_id": normalized_run_id, **record})
+
+    applied = _apply_records_batched(
+        token_data, pending_records, journal_path=journal_path, concurrency=concurrency
+    )
+    applied_records.extend(applied["applied_records"])
+    failures = applied["failures"]
+    if applied["aborted"]:
+        done_records = [r for r in applied_records if r.get("status") == "applied"]
+        rolled = _rollback_records_batched(
+            token_data,
+            [
                 {
-                    "message_id": item["message_id"],
-                    "from": item.get("from"),
-                    "subject": item.get("subject"),
-                    "matched_rules": item["matched_rules"],
-                    "add_label_ids": add_final,
-                    "remove_label_ids": remove_final,
-                    "status": "planned",
+                    "message_id": done["message_id"],
+                    "add_label_ids": done.get("remove_label_ids", []),
+                    "remove_label_ids": done.get("add_label_ids", []),
                 }
-            )
-            continue
-
-        try:
-            _gmail_modify_message(token_data, item["message_id"], add_final, remove_final)
-            record = {
-                "run_id": normalized_run_id,
-                "message_id": item["message_id"],
-                "from": item.get("from"),
-                "subject": item.get("subject"),
-                "matched_rules": item["matched_rules"],
-                "add_label_ids": add_final,
-                "remove_label_ids": remove_final,
-                "status": "applied",
-                "applied_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-            }
-            applied_records.append(record)
-            _append_jsonl(journal_path, record)
-        except Exception as exc:
-            failures.append({"message_id": meta["id"], "error": str(exc)})
-            attempted = len([r for r in applied_records if r.get("status") in {"applied", "noop"}]) + len(failures)
-            failure_rate = len(failures) / max(1, attempted)
-            if failure_rate > 0.10:
-                rollback_errors = []
-                for done in reversed([r for r in applied_records if r.get("status") == "applied"]):
-                    try:
-                        _gmail_modify_message(
-                            token_data,
-                            done["message_id"],
-                            done.get("remove_label_ids", []),
-                            done.get("add_label_ids", []),
-                        )
-                        done["rollback"] = "ok"
-                        _append_jsonl(
-                            journal_path,
-                            {
-                                "run_id": normalized_run_id,
-                                "message_id": done["message_id"],
-                                "status": "rolled_back",
-                                "rolled_back_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-                            },
-                        )
-                    except Exception as rb_exc:
-                        done["rollback"] = "fail"
-                        rollback_errors.append({"message_id": done["message_id"], "error": str(rb_exc)})
-                return {
-                    "status": "fail",
-                    "query": primary_query,
-                    "query_sequence": query_sequence,
-                    "limit": apply_limit,
+                for done in reversed(done_records)
+            ],
+        )
+        rolled_ids = set(rolled["rolled_back_ids"])
+        rolled_back_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        for done in done_records:
+            done["rollback"] = "ok" if done["message_id"] in rolled_ids else "fail"
+        _append_jsonl_rows(
+            journal_path,
+            [
+                {
                     "run_id": normalized_run_id,
-                    "journal_path": str(journal_path),
-                    "applied_records": applied_records,
-                    "protected_skips": protected_skips,
-                    "self_sent_skips": self_sent_skips,
-                    "failures": failures,
-                    "rollback_errors": rollback_errors,
-                    "message": "stopped: failure rate > 10%, rollback executed",
-                    "rollback_ready": False,
+                    "message_id": done["message_id"],
+                    "status": "rolled_back",
+                    "rolled_back_at": rolled_back_at,
                 }
+                for done in reversed(done_records)
+                if done["rollback"] == "ok"
+            ],
+        )
+        rollback_errors = rolled["failures"]
+        return {
+            "status": "fail",
+            "query": primary_query,
+            "query_sequence": query_sequence,
+            "limit": apply_limit,
+            "run_id": normalized_run_id,
+            "journal_path": str(journal_path),
+            "applied_records": applied_records,
+            "protected_skips": protected_skips,
+            "self_sent_skips": self_sent_skips,
+            "failures": failures,
+            "rollback_errors": rollback_errors,
+            "batch_modify_calls": applied["batch_modify_calls"],
+            "message": "stopped: failure rate > 10%, rollback executed",
+            "rollback_ready": False,
+        }
 
-    _write_token_artifact(token_file, token_data)
+    _token_manager(token_file).persist()
     return {
         "status": "ok",
         "query": primary_query,
@@ -2387,6 +4724,7 @@ def _run_apply_batch(
         "protected_skips": protected_skips,
         "self_sent_skips": self_sent_skips,
         "applied_records": applied_records,
+        "batch_modify_calls": applied["batch_modify_calls"],
         "self_sent_policy": "skip_except_manual" if allow_self_sent_manual else "skip_and_manual_review",
         "rollback_ready": not dry_run and any(r.get("status") == "applied" for r in applied_records),
     }
@@ -2404,24 +4742,44 @@ def _run_build_snapshot(
     snapshot_queue: str = "",
     snapshot_min_hours: int = 0,
     snapshot_senders: Optional[List[str]] = None,
+    concurrency: int = 1,
+    offline: bool = False,
+    profile: bool = False,
 ) -> Dict[str, Any]:
     resolved_target_rule_ids = _resolve_snapshot_target_rule_ids(
         snapshot_queue=snapshot_queue,
         snapshot_rule_ids=list(snapshot_rule_ids or []),
     )
-    built = _build_phase10_candidates(
-        label_file=label_file,
-        filter_file=filter_file,
-        apply_limit=snapshot_limit,
-        apply_hours=snapshot_hours,
-        apply_min_hours=snapshot_min_hours,
-        allow_critical=allow_critical,
-        allow_self_sent_manual=allow_self_sent_manual,
-        target_rule_ids=resolved_target_rule_ids,
-        snapshot_senders=snapshot_senders,
-    )
+    if offline:
+        built = _build_phase10_candidates_offline(
+            label_file=label_file,
+            filter_file=filter_file,
+            apply_limit=snapshot_limit,
+            apply_hours=snapshot_hours,
+            apply_min_hours=snapshot_min_hours,
+            allow_critical=allow_critical,
+            allow_self_sent_manual=allow_self_sent_manual,
+            target_rule_ids=resolved_target_rule_ids,
+            snapshot_senders=snapshot_senders,
+            profile=profile,
+        )
+    else:
+        built = _build_phase10_candidates(
+            label_file=label_file,
+            filter_file=filter_file,
+            apply_limit=snapshot_limit,
+            apply_hours=snapshot_hours,
+            apply_min_hours=snapshot_min_hours,
+            allow_critical=allow_critical,
+            allow_self_sent_manual=allow_self_sent_manual,
+            target_rule_ids=resolved_target_rule_ids,
+            snapshot_senders=snapshot_senders,
+            concurrency=concurrency,
+            profile=profile,
+        )
     payload = {
         "status": "ok",
+        "source": built["source"],
         "query": built["query"],
         "query_sequence": built["query_sequence"],
         "target_queue": snapshot_queue or None,
@@ -2435,6 +4793,12 @@ def _run_build_snapshot(
         "candidates": built["candidate_messages"],
         "snapshot_path": str(snapshot_file),
     }
+    if offline:
+        payload["mirror_synced_at"] = built["mirror_synced_at"]
+        payload["mirror_current"] = built["mirror_current"]
+    for key in ("query_plan", "rule_profile"):
+        if key in built:
+            payload[key] = built[key]
     _write_json_artifact(snapshot_file, payload)
     return payload
 
@@ -2444,6 +4808,7 @@ def _run_apply_snapshot(
     approval_text: str,
     run_id: Optional[str],
     journal_file: Optional[Path],
+    concurrency: int = 1,
 ) -> Dict[str, Any]:
     if approval_text.strip() != PHASE10_APPLY_APPROVAL_TEXT:
         raise ValueError("approval text mismatch")
@@ -2453,24 +4818,18 @@ def _run_apply_snapshot(
         raise ValueError("snapshot candidates must be a list")
 
     token_file = Path(os.environ["GMAIL_TOKEN_FILE"])
-    token_data = _load_token_artifact(token_file)
-    if _token_expired(token_data):
-        token_data = _refresh_access_token(token_data)
-        _write_token_artifact(token_file, token_data)
+    token_data = _token_manager(token_file).current()
 
     normalized_run_id = run_id or _build_apply_run_id()
     journal_path = journal_file or _default_apply_journal_path(normalized_run_id)
-    applied_records = []
-    failures = []
+    pending_records = []
+    invalid_items = []
     for item in candidates:
-        try:
-            _gmail_modify_message(
-                token_data,
-                item["message_id"],
-                item.get("planned_add_label_ids", []),
-                item.get("planned_remove_label_ids", []),
-            )
-            record = {
+        if not isinstance(item, dict) or not isinstance(item.get("message_id"), str):
+            invalid_items.append({"message_id": None, "error": "snapshot candidate missing message_id"})
+            continue
+        pending_records.append(
+            {
                 "run_id": normalized_run_id,
                 "message_id": item["message_id"],
                 "from": item.get("from"),
@@ -2478,16 +4837,14 @@ def _run_apply_snapshot(
                 "matched_rules": item.get("matched_rules", []),
                 "add_label_ids": item.get("planned_add_label_ids", []),
                 "remove_label_ids": item.get("planned_remove_label_ids", []),
-                "status": "applied",
-                "applied_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
             }
-            applied_records.append(record)
-            _append_jsonl(journal_path, record)
-        except Exception as exc:
-            failures.append({"message_id": item.get("message_id"), "error": str(exc)})
-            if len(failures) / max(1, len(applied_records) + len(failures)) > 0.10:
-                break
-    _write_token_artifact(token_file, token_data)
+        )
+    applied = _apply_records_batched(
+        token_data, pending_records, journal_path=journal_path, concurrency=concurrency
+    )
+    applied_records = applied["applied_records"]
+    failures = invalid_items + applied["failures"]
+    _token_manager(token_file).persist()
     return {
         "status": "ok" if not failures else "fail",
         "snapshot_path": str(snapshot_file),
@@ -2496,6 +4853,7 @@ def _run_apply_snapshot(
         "selected_candidates": len(candidates),
         "applied": len(applied_records),
         "failures": failures,
+        "batch_modify_calls": applied["batch_modify_calls"],
         "rollback_ready": bool(applied_records),
     }
 
@@ -2506,6 +4864,142 @@ def _default_trash_journal_path(run_id: str) -> Path:
     return base_dir / f"trash_commit_journal_{run_id}.jsonl"
 
 
+def _mirror_full_scan(token_data: Dict[str, Any], mirror: _MetadataMirror, concurrency: int = 1) -> Dict[str, Any]:
+    # Take the history id before listing so changes made during the scan replay on the next sync.
+    history_id = str(_gmail_get_profile(token_data).get("historyId") or "")
+    listed = _gmail_list_messages(token_data, query="")
+    errors: Dict[str, str] = {}
+    fetched = sum(
+        1
+        for _, meta in _iter_message_metadata(token_data, listed, errors=errors, concurrency=concurrency, refresh=True)
+        if meta is not None
+    )
+    listed_set = set(listed)
+    removed = mirror.delete([mid for mid in mirror.all_ids() if mid not in listed_set])
+    if not errors:
+        now = time.time()
+        mirror.set_meta({"history_id": history_id, "full_scan_at": now, "synced_at": now})
+    return {
+        "sync_mode": "full",
+        "history_id": history_id,
+        "messages_listed": len(listed),
+        "metadata_fetched": fetched,
+        "messages_removed": removed,
+        "failures": [{"message_id": mid, "error": err} for mid, err in sorted(errors.items())],
+    }
+
+
+def _mirror_incremental_sync(
+    token_data: Dict[str, Any],
+    mirror: _MetadataMirror,
+    start_history_id: str,
+    concurrency: int = 1,
+) -> Dict[str, Any]:
+    records, latest_history_id = _gmail_list_history(token_data, start_history_id)
+    added: List[str] = []
+    deleted = set()
+    label_changes = 0
+    for record in records:
+        for item in record.get("messagesAdded", []) or []:
+            mid = (item.get("message") or {}).get("id")
+            if isinstance(mid, str):
+                added.append(mid)
+                deleted.discard(mid)
+        for item in record.get("messagesDeleted", []) or []:
+            mid = (item.get("message") or {}).get("id")
+            if isinstance(mid, str):
+                deleted.add(mid)
+        for kind in ("labelsAdded", "labelsRemoved"):
+            for item in record.get(kind, []) or []:
+                mid = (item.get("message") or {}).get("id")
+                label_ids = [x for x in item.get("labelIds", []) or [] if isinstance(x, str)]
+                if not isinstance(mid, str) or not label_ids:
+                    continue
+                label_changes += 1
+                if kind == "labelsAdded":
+                    mirror.apply_label_delta([mid], label_ids, [])
+                else:
+                    mirror.apply_label_delta([mid], [], label_ids)
+    # Label changes on rows we never mirrored need a fetch as well.
+    touched = {
+        (item.get("message") or {}).get("id")
+        for record in records
+        for kind in ("labelsAdded", "labelsRemoved")
+        for item in record.get(kind, []) or []
+    }
+    known = mirror.known_ids(mid for mid in touched if isinstance(mid, str))
+    to_fetch: List[str] = []
+    seen = set()
+    for mid in added + sorted(mid for mid in touched if isinstance(mid, str) and mid not in known):
+        if mid not in deleted and mid not in seen:
+            seen.add(mid)
+            to_fetch.append(mid)
+    errors: Dict[str, str] = {}
+    fetched = sum(
+        1
+        for _, meta in _iter_message_metadata(token_data, to_fetch, errors=errors, concurrency=concurrency, refresh=True)
+        if meta is not None
+    )
+    removed = mirror.delete(sorted(deleted))
+    if not errors:
+        mirror.set_meta({"history_id": latest_history_id, "synced_at": time.time()})
+    return {
+        "sync_mode": "incremental",
+        "start_history_id": start_history_id,
+        "history_id": latest_history_id,
+        "history_records": len(records),
+        "messages_added": len(added),
+        "messages_removed": removed,
+        "label_changes": label_changes,
+        "metadata_fetched": fetched,
+        "failures": [{"message_id": mid, "error": err} for mid, err in sorted(errors.items())],
+    }
+
+
+def _run_mirror_sync(concurrency: int = 1, full: bool = False) -> Dict[str, Any]:
+    required_env = [
+        "GMAIL_TOKEN_FILE",
+        "GMAIL_CLIENT_SECRET_PATH",
+        "GMAIL_TOKEN_CACHE",
+        "GMAIL_TOKEN_STORE",
+    ]
+    env_state = _collect_required_env(required_env)
+    if env_state["missing"]:
+        raise ValueError(f"missing required env vars: {', '.join(env_state['missing'])}")
+    mirror = _metadata_mirror()
+    if mirror is None:
+        raise ValueError("metadata mirror is disabled; --sync needs GMAIL_MIRROR_DB")
+    token_file = Path(os.environ["GMAIL_TOKEN_FILE"])
+    token_data = _token_manager(token_file).current()
+    start_history_id = mirror.get_meta("history_id")
+    fallback_reason = None
+    result: Optional[Dict[str, Any]] = None
+    if full:
+        fallback_reason = "requested"
+    elif not start_history_id or not mirror.get_meta("full_scan_at"):
+        fallback_reason = "no_history_id"
+    else:
+        try:
+            result = _mirror_incremental_sync(token_data, mirror, start_history_id, concurrency=concurrency)
+        except ValueError as exc:
+            # history.list answers 404 once startHistoryId is older than Gmail keeps.
+            if not str(exc).startswith("gmail api error 404"):
+                raise
+            fallback_reason = "history_id_expired"
+    if result is None:
+        result = _mirror_full_scan(token_data, mirror, concurrency=concurrency)
+        result["fallback_reason"] = fallback_reason
+    # history.list does not report label renames or creations, so the catalogue is re-read each sync.
+    result["labels"] = len(_label_catalogue_for(token_data).labels(token_data, refresh=True))
+    _token_manager(token_file).persist()
+    return {
+        "status": "ok" if not result["failures"] else "warn",
+        "mirror_path": str(mirror.path),
+        "mirror_rows": mirror.count(),
+        **result,
+    }
+
+
 def _run_trash_commit(
     trash_label: str,
     older_than_days: int,
@@ -2513,34 +5007,36 @@ def _run_trash_commit(
     approval_text: str,
     run_id: Optional[str],
     journal_file: Optional[Path],
+    concurrency: int = 1,
 ) -> Dict[str, Any]:
     if approval_text.strip() != PHASE10_TRASH_APPROVAL_TEXT:
         raise ValueError("approval text mismatch")
     query = f"label:{trash_label} older_than:{older_than_days}d"
     token_file = Path(os.environ["GMAIL_TOKEN_FILE"])
-    token_data = _load_token_artifact(token_file)
-    if _token_expired(token_data):
-        token_data = _refresh_access_token(token_data)
-        _write_token_artifact(token_file, token_data)
+    token_data = _token_manager(token_file).current()
     normalized_run_id = run_id or _build_apply_run_id()
     journal_path = journal_file or _default_trash_journal_path(normalized_run_id)
     message_ids = _gmail_list_messages(token_data, query=query, max_total=trash_limit)
     trashed = []
     failures = []
-    for message_id in message_ids:
-        try:
-            _gmail_trash_message(token_data, message_id)
-            record = {
-                "run_id": normalized_run_id,
-                "message_id": message_id,
-                "status": "trashed",
-                "trashed_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-            }
-            trashed.append(record)
-            _append_jsonl(journal_path, record)
-        except Exception as exc:
+    for call, _, exc in _iter_gmail_calls(
+        token_data,
+        (("trash_message", _gmail_trash_message, (message_id,)) for message_id in message_ids),
+        concurrency,
+    ):
+        message_id = call[2][0]
+        if exc is not None:
             failures.append({"message_id": message_id, "error": str(exc)})
-    _write_token_artifact(token_file, token_data)
+            continue
+        record = {
+            "run_id": normalized_run_id,
+            "message_id": message_id,
+            "status": "trashed",
+            "trashed_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        }
+        trashed.append(record)
+        _append_jsonl(journal_path, record)
+    _token_manager(token_file).persist()
     return {
         "status": "ok" if not failures else "fail",
         "query": query,
@@ -2551,35 +5047,51 @@ def _run_trash_commit(
     }
 
 
-def _run_trash_rollback(journal_file: Path, run_id: Optional[str]) -> Dict[str, Any]:
+def _run_trash_rollback(journal_file: Path, run_id: Optional[str], bulk: bool = True) -> Dict[str, Any]:
     token_file = Path(os.environ["GMAIL_TOKEN_FILE"])
-    token_data = _load_token_artifact(token_file)
-    if _token_expired(token_data):
-        token_data = _refresh_access_token(token_data)
-        _write_token_artifact(token_file, token_data)
+    token_data = _token_manager(token_file).current()
     rows = _load_jsonl(journal_file)
     target_rows = [row for row in rows if row.get("status") == "trashed" and (not run_id or row.get("run_id") == run_id)]
     restored = []
     failures = []
-    for row in reversed(target_rows):
-        try:
-            _gmail_untrash_message(token_data, row["message_id"])
-            restored.append(row["message_id"])
-        except Exception as exc:
-            failures.append({"message_id": row.get("message_id"), "error": str(exc)})
-    _write_token_artifact(token_file, token_data)
+    batch_modify_calls = 0
+    if bulk:
+        rolled = _rollback_records_batched(
+            token_data,
+            [
+                {"message_id": row["message_id"], "add_label_ids": [], "remove_label_ids": ["TRASH"]}
+                for row in reversed(target_rows)
+                if isinstance(row.get("message_id"), str)
+            ],
+            journal_path=journal_file,
+            run_id=run_id,
+        )
+        restored = rolled["rolled_back_ids"]
+        failures = rolled["failures"]
+        batch_modify_calls = rolled["batch_modify_calls"]
+    else:
+        for row in reversed(target_rows):
+            try:
+                _gmail_untrash_message(token_data, row["message_id"])
+                restored.append(row["message_id"])
+            except Exception as exc:
+                failures.append({"message_id": row.get("message_id"), "error": str(exc)})
+    _token_manager(token_file).persist()
     return {
         "status": "ok" if not failures else "fail",
         "journal_path": str(journal_file),
         "run_id": run_id,
+        "rollback_mode": "bulk" if bulk else "sequential",
         "restored": len(restored),
         "failures": failures,
+        "batch_modify_calls": batch_modify_calls,
     }
 
 
 def _run_apply_rollback(
     journal_file: Path,
     run_id: Optional[str],
+    bulk: bool = True,
 ) -> Dict[str, Any]:
     required_env = [
         "GMAIL_TOKEN_FILE",
@@ -2592,10 +5104,7 @@ def _run_apply_rollback(
         raise ValueError(f"missing required env vars: {', '.join(env_state['missing'])}")
 
     token_file = Path(os.environ["GMAIL_TOKEN_FILE"])
-    token_data = _load_token_artifact(token_file)
-    if _token_expired(token_data):
-        token_data = _refresh_access_token(token_data)
-        _write_token_artifact(token_file, token_data)
+    token_data = _token_manager(token_file).current()
 
     rows = _load_jsonl(journal_file)
     applied_rows = [
@@ -2614,37 +5123,79 @@ def _run_apply_rollback(
 
     rolled_back = []
     rollback_failures = []
-    for row in reversed(applied_rows):
-        try:
-            _gmail_modify_message(
-                token_data,
-                row["message_id"],
-                row.get("remove_label_ids", []),
-                row.get("add_label_ids", []),
+    batch_modify_calls = 0
+    if bulk:
+        rolled = _rollback_records_batched(
+            token_data,
+            [
+                {
+                    "message_id": row["message_id"],
+                    "add_label_ids": row.get("remove_label_ids", []),
+                    "remove_label_ids": row.get("add_label_ids", []),
+                }
+                for row in reversed(applied_rows)
+                if isinstance(row.get("message_id"), str)
+            ],
+            journal_path=journal_file,
+            run_id=run_id,
+        )
+        rolled_ids = Counter(rolled["rolled_back_ids"])
+        rolled_back_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        for row in reversed(applied_rows):
+            if rolled_ids[row.get("message_id")] <= 0:
+                continue
+            rolled_ids[row["message_id"]] -= 1
+            rolled_back.append(
+                {
+                    "run_id": row.get("run_id"),
+                    "message_id": row["message_id"],
+                    "status": "rolled_back",
+                    "rolled_back_at": rolled_back_at,
+                }
             )
-            event = {
-                "run_id": row.get("run_id"),
-                "message_id": row["message_id"],
-                "status": "rolled_back",
-                "rolled_back_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-            }
-            rolled_back.append(event)
-            _append_jsonl(journal_file, event)
-        except Exception as exc:
-            rollback_failures.append({"message_id": row.get("message_id"), "error": str(exc)})
+        _append_jsonl_rows(journal_file, rolled_back)
+        rollback_failures = rolled["failures"]
+        batch_modify_calls = rolled["batch_modify_calls"]
+    else:
+        for row in reversed(applied_rows):
+            try:
+                _gmail_modify_message(
+                    token_data,
+                    row["message_id"],
+                    row.get("remove_label_ids", []),
+                    row.get("add_label_ids", []),
+                )
+                event = {
+                    "run_id": row.get("run_id"),
+                    "message_id": row["message_id"],
+                    "status": "rolled_back",
+                    "rolled_back_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+                }
+                rolled_back.append(event)
+                _append_jsonl(journal_file, event)
+            except Exception as exc:
+                rollback_failures.append({"message_id": row.get("message_id"), "error": str(exc)})
 
-    _write_token_artifact(token_file, token_data)
+    _token_manager(token_file).persist()
     return {
         "status": "ok" if not rollback_failures else "fail",
         "journal_path": str(journal_file),
         "run_id": run_id,
+        "rollback_mode": "bulk" if bulk else "sequential",
         "rolled_back": len(rolled_back),
         "rollback_failures": rollback_failures,
+        "batch_modify_calls": batch_modify_calls,
         "remaining_impacted_messages": len(rollback_failures),
     }
 
 
-def run_plan(label_file: Path, filter_file: Path, sample_path: Optional[Path] = None) -> Dict[str, Any]:
+def run_plan(
+    label_file: Path,
+    filter_file: Path,
+    sample_path: Optional[Path] = None,
+    workers: int = 1,
+    profile: bool = False,
+) -> Dict[str, Any]:
     loaded = _load_and_validate(label_file, filter_file)
     report = loaded["report"]
     labels_data = loaded["labels"]
@@ -2710,15 +5261,77 @@ def run_plan(label_file: Path, filter_file: Path, sample_path: Optional[Path] =
             samples = samples["messages"]
         if not isinstance(samples, list):
             raise ValueError("sample_path must contain array or {\"messages\":[]}")
+        profiler = (
+            _RuleProfiler(_compile_enabled_rules(filters_data.get("filters", []))) if profile else None
+        )
         plan["dry_run_simulation"] = _simulate(
-            filters_data.get("filters", []), samples
+            filters_data.get("filters", []), samples, workers=workers, profiler=profiler
         )
+        if profiler is not None:
+            plan["rule_profile"] = profiler.report()
 
     return plan
 
 
+def _attach_call_reports(result: Dict[str, Any]) -> Dict[str, Any]:
+    concurrency_report = _GMAIL_CONCURRENCY.report()
+    if concurrency_report["calls"]:
+        result["adaptive_concurrency"] = concurrency_report
+    pool_report = _GMAIL_POOL.report()
+    if pool_report:
+        result["connection_pool"] = pool_report
+    metrics = _GMAIL_METRICS.report()
+    if metrics:
+        result["metrics"] = metrics
+    mirror = _METADATA_MIRROR
+    if mirror is not None:
+        mirror_report = mirror.report()
+        if len(mirror_report) > 2:
+            result["mirror"] = mirror_report
+    classification = _CLASSIFICATION_CACHE.report()
+    if classification:
+        result["classification_cache"] = classification
+    return result
+
+
+def _prometheus_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_prometheus_textfile(path: Path, mode_metrics: Dict[str, Dict[str, Any]]) -> None:
+    families = [
+        ("gmail_agent_api_calls_total", "counter", "Gmail API HTTP attempts per endpoint.", "calls"),
+        ("gmail_agent_api_retries_total", "counter", "Gmail API retries per endpoint.", "retries"),
+        ("gmail_agent_api_errors_total", "counter", "Gmail API failed attempts per endpoint.", "errors"),
+        ("gmail_agent_api_bytes_out_total", "counter", "Request body bytes sent per endpoint.", "bytes_out"),
+        ("gmail_agent_api_bytes_in_total", "counter", "Response body bytes received per endpoint.", "bytes_in"),
+    ]
+    lines: List[str] = []
+    for name, kind, help_text, key in families:
+        lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"])
+        for mode, metrics in sorted(mode_metrics.items()):
+            for endpoint, values in sorted(metrics.items()):
+                labels = f'mode="{_prometheus_label(mode)}",endpoint="{_prometheus_label(endpoint)}"'
+                lines.append(f"{name}{{{labels}}} {values[key]}")
+    name = "gmail_agent_api_latency_seconds"
+    lines.extend([f"# HELP {name} Gmail API latency per endpoint.", f"# TYPE {name} summary"])
+    for mode, metrics in sorted(mode_metrics.items()):
+        for endpoint, values in sorted(metrics.items()):
+            labels = f'mode="{_prometheus_label(mode)}",endpoint="{_prometheus_label(endpoint)}"'
+            for quantile in _GmailMetrics.QUANTILES:
+                value = values["latency_ms"].get(f"p{int(quantile * 100)}")
+                if value is not None:
+                    lines.append(f'{name}{{{labels},quantile="{quantile}"}} {value / 1000:.6f}')
+            lines.append(f"{name}_sum{{{labels}}} {values['latency_ms']['sum'] / 1000:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {values['calls']}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
 def _append_mode_metadata(payload: Dict[str, Any], mode: str, result: Dict[str, Any]) -> None:
-    payload[mode] = result
+    payload[mode] = _attach_call_reports(result)
     if result.get("status") == "fail":
         payload["status"] = "fail"
 
@@ -2735,7 +5348,35 @@ def main() -> int:
     parser.add_argument("--build-snapshot", action="store_true", help="build snapshot for snapshot->apply flow")
     parser.add_argument("--trash-commit", action="store_true", help="move TrashCandidate messages to TRASH")
     parser.add_argument("--trash-rollback", action="store_true", help="rollback trash-commit using journal")
+    parser.add_argument("--sync", action="store_true", help="sync the local metadata mirror from Gmail history")
+    parser.add_argument(
+        "--sync-full",
+        action="store_true",
+        help="with --sync, force a full mailbox rescan instead of replaying history",
+    )
     parser.add_argument("--sample", type=str, help="JSON sample file for dry-run")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="with --dry-run, read --sample as NDJSON ('-' for stdin) and write NDJSON results plus a summary record",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="dry-run simulation processes; >1 shards messages across a process pool, output order unchanged",
+    )
+    parser.add_argument(
+        "--profile-rules",
+        action="store_true",
+        help="add a per-rule/per-pattern hit, loss and scan-time report to dry-run and snapshot payloads",
+    )
+    parser.add_argument(
+        "--stream-output",
+        type=str,
+        default="-",
+        help="NDJSON result destination for --stream (default: stdout)",
+    )
     parser.add_argument(
         "--connect-check",
         action="store_true",
@@ -2928,8 +5569,41 @@ def main() -> int:
         action="store_true",
         help="allow self-sent messages only when matched rules start with rule_manual_",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=max(1, int(os.getenv("GMAIL_CONCURRENCY", "1"))),
+        help="max in-flight Gmail calls for snapshot/apply/trash/archive modes (1 = sequential)",
+    )
+    parser.add_argument(
+        "--rollback-mode",
+        type=str,
+        choices=["bulk", "sequential"],
+        default="bulk",
+        help="rollback replay mode: grouped batchModify (bulk) or one call per message (sequential)",
+    )
+    parser.add_argument(
+        "--snapshot-offline",
+        action="store_true",
+        help="with --build-snapshot, evaluate rules against the local metadata mirror only (no Gmail calls)",
+    )
+    parser.add_argument(
+        "--no-mirror",
+        action="store_true",
+        help="bypass the local SQLite metadata mirror (GMAIL_MIRROR_DB=off does the same)",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        default="",
+        help="also write per-endpoint Gmail API metrics as a Prometheus textfile",
+    )
     parser.add_argument("--pretty", action="store_true")
     args = parser.parse_args()
+    if args.no_mirror:
+        global _METADATA_MIRROR_ENABLED
+        _METADATA_MIRROR_ENABLED = False
+    _GMAIL_CONCURRENCY.configure(max_window=args.concurrency)
 
     payload = {
         "status": "pass",
@@ -2939,12 +5613,12 @@ def main() -> int:
 
     label_path = Path(args.labels)
     filter_path = Path(args.filters)
-    sample_path = Path(args.sample) if args.sample else None
+    sample_path = Path(args.sample) if args.sample and not args.stream else None
 
     payload["artifact"] = {
         "labels": str(label_path),
         "filters": str(filter_path),
-        "sample": str(sample_path) if sample_path else None,
+        "sample": str(sample_path) if sample_path else (args.sample or None),
     }
 
     if args.connect_check:
@@ -2987,17 +5661,20 @@ def main() -> int:
         or bool(args.apply_snapshot)
         or args.trash_commit
         or args.trash_rollback
+        or args.sync
     )
     if not has_mode:
         payload = {
             "status": "fail",
-            "message": "no mode selected. Use --plan-only/--dry-run/--apply/--apply-batch/--build-snapshot/--apply-snapshot/--trash-commit/--trash-rollback/--apply-rollback/--archive-migrate/--archive-rollback.",
+            "message": "no mode selected. Use --plan-only/--dry-run/--apply/--apply-batch/--build-snapshot/--apply-snapshot/--trash-commit/--trash-rollback/--apply-rollback/--archive-migrate/--archive-rollback/--sync.",
         }
         print(json.dumps(payload, ensure_ascii=False, indent=2 if args.pretty else None))
         return 1
 
     if args.plan_only or args.dry_run or args.connect_check or args.oauth_login or args.apply or args.apply_batch or args.apply_rollback or args.build_snapshot or bool(args.apply_snapshot) or args.trash_commit or args.trash_rollback:
-        plan = run_plan(label_path, filter_path, sample_path if args.sample else None)
+        plan = run_plan(
+            label_path, filter_path, sample_path, workers=max(1, args.workers), profile=args.profile_rules
+        )
         payload["plan"] = plan
         if plan["status"] != "pass":
             payload["status"] = plan["status"]
@@ -3012,6 +5689,38 @@ def main() -> int:
             }
             payload["status"] = "fail"
 
+    if args.stream:
+        try:
+            if not args.dry_run or not args.sample:
+                raise ValueError("--stream needs --dry-run and --sample (NDJSON path or '-')")
+            if payload.get("plan", {}).get("status") == "fail":
+                raise ValueError("policy artifacts have blocking errors; fix before dry-run")
+            _append_mode_metadata(
+                payload=payload,
+                mode="dry_run_stream",
+                result=_run_dry_run_stream(
+                    filter_path,
+                    args.sample,
+                    args.stream_output,
+                    workers=max(1, args.workers),
+                    profile=args.profile_rules,
+                ),
+            )
+        except Exception as exc:
+            payload["dry_run_stream"] = _attach_call_reports({"status": "fail", "message": str(exc)})
+            payload["status"] = "fail"
+
+    if args.sync:
+        try:
+            _append_mode_metadata(
+                payload=payload,
+                mode="sync",
+                result=_run_mirror_sync(concurrency=args.concurrency, full=args.sync_full),
+            )
+        except Exception as exc:
+            payload["sync"] = _attach_call_reports({"status": "fail", "message": str(exc)})
+            payload["status"] = "fail"
+
     if args.apply:
         try:
             _append_mode_metadata(
@@ -3027,7 +5736,7 @@ def main() -> int:
                 ),
             )
         except Exception as exc:
-            payload["apply_pilot"] = {"status": "fail", "message": str(exc)}
+            payload["apply_pilot"] = _attach_call_reports({"status": "fail", "message": str(exc)})
             payload["status"] = "fail"
 
     if args.apply_batch:
@@ -3046,10 +5755,11 @@ def main() -> int:
                     dry_run=args.dry_run,
                     journal_file=Path(args.apply_journal_file) if args.apply_journal_file else None,
                     run_id=_normalize_run_id(args.apply_run_id),
+                    concurrency=args.concurrency,
                 ),
             )
         except Exception as exc:
-            payload["apply_batch"] = {"status": "fail", "message": str(exc)}
+            payload["apply_batch"] = _attach_call_reports({"status": "fail", "message": str(exc)})
             payload["status"] = "fail"
 
     if args.build_snapshot:
@@ -3069,10 +5779,13 @@ def main() -> int:
                     snapshot_rule_ids=_parse_csv_arg(args.snapshot_rule_ids),
                     snapshot_senders=_parse_csv_arg(args.snapshot_senders),
                     snapshot_queue=(args.snapshot_queue or "").strip(),
+                    concurrency=args.concurrency,
+                    offline=args.snapshot_offline,
+                    profile=args.profile_rules,
                 ),
             )
         except Exception as exc:
-            payload["build_snapshot"] = {"status": "fail", "message": str(exc)}
+            payload["build_snapshot"] = _attach_call_reports({"status": "fail", "message": str(exc)})
             payload["status"] = "fail"
 
     if args.apply_snapshot:
@@ -3085,10 +5798,11 @@ def main() -> int:
                     approval_text=args.approve_text,
                     run_id=_normalize_run_id(args.apply_run_id),
                     journal_file=Path(args.apply_journal_file) if args.apply_journal_file else None,
+                    concurrency=args.concurrency,
                 ),
             )
         except Exception as exc:
-            payload["apply_snapshot"] = {"status": "fail", "message": str(exc)}
+            payload["apply_snapshot"] = _attach_call_reports({"status": "fail", "message": str(exc)})
             payload["status"] = "fail"
 
     if args.apply_rollback:
@@ -3103,10 +5817,11 @@ def main() -> int:
                 result=_run_apply_rollback(
                     journal_file=journal_path,
                     run_id=rollback_run_id,
+                    bulk=args.rollback_mode == "bulk",
                 ),
             )
         except Exception as exc:
-            payload["apply_rollback"] = {"status": "fail", "message": str(exc)}
+            payload["apply_rollback"] = _attach_call_reports({"status": "fail", "message": str(exc)})
             payload["status"] = "fail"
 
     if args.trash_commit:
@@ -3121,10 +5836,11 @@ def main() -> int:
                     approval_text=args.approve_text,
                     run_id=_normalize_run_id(args.trash_run_id),
                     journal_file=Path(args.trash_journal_file) if args.trash_journal_file else None,
+                    concurrency=args.concurrency,
                 ),
             )
         except Exception as exc:
-            payload["trash_commit"] = {"status": "fail", "message": str(exc)}
+            payload["trash_commit"] = _attach_call_reports({"status": "fail", "message": str(exc)})
             payload["status"] = "fail"
 
     if args.trash_rollback:
@@ -3135,10 +5851,11 @@ def main() -> int:
                 result=_run_trash_rollback(
                     journal_file=Path(args.trash_journal_file),
                     run_id=_normalize_run_id(args.trash_run_id),
+                    bulk=args.rollback_mode == "bulk",
                 ),
             )
         except Exception as exc:
-            payload["trash_rollback"] = {"status": "fail", "message": str(exc)}
+            payload["trash_rollback"] = _attach_call_reports({"status": "fail", "message": str(exc)})
             payload["status"] = "fail"
 
     if args.archive_migrate:
@@ -3159,10 +5876,11 @@ def main() -> int:
                     run_id=run_id,
                     approval_text=args.approve_text,
                     dry_run=args.dry_run,
+                    concurrency=args.concurrency,
                 ),
             )
         except Exception as exc:
-            payload["archive_migrate"] = {"status": "fail", "message": str(exc)}
+            payload["archive_migrate"] = _attach_call_reports({"status": "fail", "message": str(exc)})
             payload["status"] = "fail"
 
     if args.archive_rollback:
@@ -3177,15 +5895,31 @@ def main() -> int:
                     run_id=run_id,
                     checkpoint_file=Path(args.checkpoint_file),
                     journal_file=Path(args.journal_file),
+                    bulk=args.rollback_mode == "bulk",
                 ),
             )
         except Exception as exc:
-            payload["archive_rollback"] = {"status": "fail", "message": str(exc)}
+            payload["archive_rollback"] = _attach_call_reports({"status": "fail", "message": str(exc)})
             payload["status"] = "fail"
 
-    print(
-        json.dumps(payload, ensure_ascii=False, indent=2 if args.pretty else None, sort_keys=True)
-    )
+    if args.metrics_file:
+        _write_prometheus_textfile(
+            Path(args.metrics_file),
+            {
+                mode: result["metrics"]
+                for mode, result in payload.items()
+                if isinstance(result, dict) and isinstance(result.get("metrics"), dict)
+            },
+        )
+
+    if args.stream and args.stream_output == "-":
+        # Results already went to stdout as NDJSON; the payload closes the stream as its summary record.
+        payload["record"] = "summary"
+        print(json.dumps(payload, ensure_ascii=False, sort_keys=True))
+    else:
+        print(
+            json.dumps(payload, ensure_ascii=False, indent=2 if args.pretty else None, sort_keys=True)
+        )
     return 0 if payload["status"] != "fail" else 1
 
 
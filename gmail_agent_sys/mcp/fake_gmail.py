@@ -0,0 +1,850 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Gmail REST surface used by the entrypoint.
+
+Serves labels, messages list/get/modify/batchModify/trash/untrash, the batch
+endpoint, history and profile from an in-memory mailbox seeded with a synthetic
+or JSON corpus. Latency, 429/5xx injection and per-user quota accounting are
+configurable so the mutate modes can be exercised offline:
+
+    python3 -m gmail_agent_sys.mcp.fake_gmail --port 8765 --messages 10000
+    GMAIL_API_BASE=http://127.0.0.1:8765/gmail/v1/users/me python3 -m gmail_agent_sys.mcp.entrypoint ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import random
+import re
+import secrets
+import shlex
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+from gmail_agent_sys.mcp.entrypoint import CONFIG_DIR, GMAIL_QUOTA_UNIT_COSTS, _gmail_endpoint_name
+
+
+API_PREFIX = "/gmail/v1/users/me"
+BATCH_PATH = "/batch/gmail/v1"
+SYSTEM_LABELS = [
+    "INBOX",
+    "SENT",
+    "DRAFT",
+    "TRASH",
+    "SPAM",
+    "STARRED",
+    "IMPORTANT",
+    "UNREAD",
+    "CATEGORY_PERSONAL",
+    "CATEGORY_SOCIAL",
+    "CATEGORY_PROMOTIONS",
+    "CATEGORY_UPDATES",
+    "CATEGORY_FORUMS",
+]
+SYNTHETIC_LEGACY_LABELS = ["Legacy/Receipts", "Legacy/Newsletters", "Old Projects", "Travel 2019"]
+SYNTHETIC_NOISE_SENDERS = ["friend@example.com", "team@example.org", "alerts@example.net", "hello@example.io"]
+SYNTHETIC_NOISE_SUBJECTS = ["hello", "weekly sync", "quick question", "photos", "dinner plans"]
+HISTORY_RETENTION = 100000
+HISTORY_TYPE_KEYS = {
+    "messageAdded": "messagesAdded",
+    "messageDeleted": "messagesDeleted",
+    "labelAdded": "labelsAdded",
+    "labelRemoved": "labelsRemoved",
+}
+
+
+class _FakeError(Exception):
+    def __init__(self, status: int, reason: str, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.message = message
+        self.retry_after = retry_after
+
+    def payload(self) -> Dict[str, Any]:
+        return {
+            "error": {
+                "code": self.status,
+                "message": self.message,
+                "errors": [{"reason": self.reason, "message": self.message}],
+            }
+        }
+
+
+def _label_query_key(name: str) -> str:
+    return re.sub(r"[\s/]+", "-", name.strip().lower())
+
+
+def _parse_fields(spec: str) -> Dict[str, Any]:
+    # Minimal partial-response grammar: "a,b/c,d(e,f)".
+    tree: Dict[str, Any] = {}
+    stack = [tree]
+    token = ""
+
+    def _flush() -> None:
+        nonlocal token
+        if token:
+            node = stack[-1]
+            for part in token.split("/"):
+                node = node.setdefault(part, {})
+            token = ""
+
+    for ch in spec.replace(" ", ""):
+        if ch == ",":
+            _flush()
+        elif ch == "(":
+            node = stack[-1]
+            for part in token.split("/"):
+                node = node.setdefault(part, {})
+            token = ""
+            stack.append(node)
+        elif ch == ")":
+            _flush()
+            if len(stack) > 1:
+                stack.pop()
+        else:
+            token += ch
+    _flush()
+    return tree
+
+
+def _apply_fields(value: Any, tree: Dict[str, Any]) -> Any:
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_apply_fields(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: _apply_fields(value[key], sub) for key, sub in tree.items() if key in value}
+
+
+class FakeMailbox:
+    def __init__(self, owner: str = "owner@example.com"):
+        self.owner = owner
+        self.labels: Dict[str, Dict[str, Any]] = {
+            name: {"id": name, "name": name, "type": "system"} for name in SYSTEM_LABELS
+        }
+        self.messages: Dict[str, Dict[str, Any]] = {}
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=HISTORY_RETENTION)
+        self.history_id = 1000
+        self.lock = threading.RLock()
+        self._label_seq = 0
+
+    def label_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        for label in self.labels.values():
+            if label["name"] == name:
+                return label
+        return None
+
+    def create_label(self, name: str) -> Dict[str, Any]:
+        with self.lock:
+            if self.label_by_name(name) is not None:
+                raise _FakeError(409, "duplicate", "Label name exists or conflicts")
+            self._label_seq += 1
+            label = {
+                "id": f"Label_{self._label_seq}",
+                "name": name,
+                "type": "user",
+                "labelListVisibility": "labelShow",
+                "messageListVisibility": "show",
+            }
+            self.labels[label["id"]] = label
+            return label
+
+    def ensure_label(self, name: str) -> str:
+        label = self.label_by_name(name)
+        return label["id"] if label else self.create_label(name)["id"]
+
+    def _record(self, kind: str, message: Dict[str, Any], label_ids: Optional[List[str]] = None) -> None:
+        self.history_id += 1
+        message["historyId"] = str(self.history_id)
+        ref = {"id": message["id"], "threadId": message["threadId"], "labelIds": sorted(message["labelIds"])}
+        record: Dict[str, Any] = {"id": str(self.history_id), "messages": [{"id": message["id"], "threadId": message["threadId"]}]}
+        if kind in {"labelsAdded", "labelsRemoved"}:
+            record[kind] = [{"message": ref, "labelIds": label_ids or []}]
+        else:
+            record[kind] = [{"message": ref}]
+        self.history.append(record)
+
+    def add_message(
+        self,
+        sender: str,
+        subject: str,
+        label_ids: Iterable[str],
+        internal_date_ms: int,
+        message_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        with self.lock:
+            mid = message_id or f"{secrets.token_hex(8)}"
+            message = {
+                "id": mid,
+                "threadId": thread_id or mid,
+                "labelIds": set(label_ids),
+                "from": sender,
+                "subject": subject,
+                "internalDate": int(internal_date_ms),
+                "sizeEstimate": 2048 + len(subject) * 8,
+                "snippet": subject[:80],
+            }
+            self.messages[mid] = message
+            self._record("messagesAdded", message)
+            return message
+
+    def get(self, message_id: str) -> Dict[str, Any]:
+        message = self.messages.get(message_id)
+        if message is None:
+            raise _FakeError(404, "notFound", "Requested entity was not found.")
+        return message
+
+    def modify(self, message_id: str, add: Iterable[str], remove: Iterable[str]) -> Dict[str, Any]:
+        with self.lock:
+            message = self.get(message_id)
+            add, remove = list(add), list(remove)
+            for lid in add + remove:
+                if lid not in self.labels:
+                    raise _FakeError(400, "invalidArgument", f"Invalid label: {lid}")
+            add_ids = [lid for lid in add if lid not in message["labelIds"]]
+            remove_ids = [lid for lid in remove if lid in message["labelIds"]]
+            message["labelIds"].update(add_ids)
+            message["labelIds"].difference_update(remove_ids)
+            if add_ids:
+                self._record("labelsAdded", message, add_ids)
+            if remove_ids:
+                self._record("labelsRemoved", message, remove_ids)
+            return message
+
+    def trash(self, message_id: str) -> Dict[str, Any]:
+        return self.modify(message_id, ["TRASH"], ["INBOX"])
+
+    def untrash(self, message_id: str) -> Dict[str, Any]:
+        return self.modify(message_id, [], ["TRASH"])
+
+    def render_message(self, message: Dict[str, Any], fmt: str, header_names: List[str]) -> Dict[str, Any]:
+        body = {
+            "id": message["id"],
+            "threadId": message["threadId"],
+            "labelIds": sorted(message["labelIds"]),
+            "snippet": message["snippet"],
+            "historyId": message.get("historyId", str(self.history_id)),
+            "internalDate": str(message["internalDate"]),
+            "sizeEstimate": message["sizeEstimate"],
+        }
+        if fmt == "minimal":
+            return body
+        headers = [
+            {"name": "From", "value": message["from"]},
+            {"name": "To", "value": self.owner},
+            {"name": "Subject", "value": message["subject"]},
+            {"name": "Date", "value": time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime(message["internalDate"] / 1000))},
+            {"name": "Message-ID", "value": f"<{message['id']}@fake.gmail>"},
+        ]
+        if header_names:
+            wanted = {name.lower() for name in header_names}
+            headers = [h for h in headers if h["name"].lower() in wanted]
+        body["payload"] = {"mimeType": "text/plain", "headers": headers}
+        return body
+
+    # -- search -----------------------------------------------------------------
+
+    def search(self, query: str) -> List[Dict[str, Any]]:
+        predicates = [self._term_predicate(term) for term in _split_query(query or "")]
+        include_trash = any(term.lower() in {"in:trash", "label:trash", "in:anywhere"} for term in _split_query(query or ""))
+        now_ms = int(time.time() * 1000)
+        with self.lock:
+            matched = [
+                m
+                for m in self.messages.values()
+                if (include_trash or "TRASH" not in m["labelIds"]) and all(p(m, now_ms) for p in predicates)
+            ]
+        matched.sort(key=lambda m: (-m["internalDate"], m["id"]))
+        return matched
+
+    def _term_predicate(self, term: str):
+        negate = term.startswith("-")
+        if negate:
+            term = term[1:]
+        key, sep, value = term.partition(":")
+        key = key.lower() if sep else ""
+        value = value if sep else term
+        alternatives = _split_alternatives(value)
+
+        def _text(field: str):
+            needles = [a.lower() for a in alternatives]
+            return lambda m, now: any(n in m[field].lower() for n in needles)
+
+        if key == "from":
+            pred = _text("from")
+        elif key == "subject":
+            pred = _text("subject")
+        elif key in {"label", "in"}:
+            keys = {_label_query_key(a) for a in alternatives}
+
+            def pred(m, now, keys=keys):
+                names = {_label_query_key(self.labels[lid]["name"]) for lid in m["labelIds"] if lid in self.labels}
+                return bool(keys & names) or ("anywhere" in keys)
+
+        elif key == "has" and value.lower() == "nouserlabels":
+
+            def pred(m, now):
+                return not any(self.labels.get(lid, {}).get("type") == "user" for lid in m["labelIds"])
+
+        elif key in {"newer_than", "older_than"}:
+            span_ms = _parse_relative_ms(value)
+
+            def pred(m, now, key=key, span_ms=span_ms):
+                return m["internalDate"] >= now - span_ms if key == "newer_than" else m["internalDate"] < now - span_ms
+
+        else:
+            needles = [a.lower() for a in alternatives]
+
+            def pred(m, now):
+                return any(n in m["from"].lower() or n in m["subject"].lower() for n in needles)
+
+        return (lambda m, now: not pred(m, now)) if negate else pred
+
+    # -- history ----------------------------------------------------------------
+
+    def list_history(self, start_history_id: int, history_types: List[str], label_id: Optional[str]) -> List[Dict[str, Any]]:
+        with self.lock:
+            if self.history and int(self.history[0]["id"]) > start_history_id + 1:
+                raise _FakeError(404, "notFound", "Requested entity was not found.")
+            records = []
+            for record in self.history:
+                if int(record["id"]) <= start_history_id:
+                    continue
+                if history_types and not any(HISTORY_TYPE_KEYS.get(t, t) in record for t in history_types):
+                    continue
+                if label_id and not any(
+                    label_id in change.get("labelIds", []) or label_id in change["message"].get("labelIds", [])
+                    for kind in ("messagesAdded", "messagesDeleted", "labelsAdded", "labelsRemoved")
+                    for change in record.get(kind, [])
+                ):
+                    continue
+                records.append(record)
+            return records
+
+
+def _split_query(query: str) -> List[str]:
+    terms: List[str] = []
+    buf = ""
+    depth = 0
+    quoted = False
+    for ch in query:
+        if ch == '"':
+            quoted = not quoted
+        elif ch == "(" and not quoted:
+            depth += 1
+        elif ch == ")" and not quoted:
+            depth = max(0, depth - 1)
+        if ch.isspace() and not quoted and depth == 0:
+            if buf:
+                terms.append(buf)
+            buf = ""
+            continue
+        buf += ch
+    if buf:
+        terms.append(buf)
+    return terms
+
+
+def _split_alternatives(value: str) -> List[str]:
+    value = value.strip()
+    if value.startswith("(") and value.endswith(")"):
+        value = value[1:-1]
+        try:
+            parts = shlex.split(value)
+        except ValueError:
+            parts = value.split()
+        return [p for p in parts if p.upper() != "OR"] or [""]
+    return [value.strip('"')]
+
+
+def _parse_relative_ms(value: str) -> int:
+    match = re.fullmatch(r"(\d+)([dmy]?)", value.strip().lower())
+    if not match:
+        return 0
+    amount = int(match.group(1))
+    unit_days = {"": 1, "d": 1, "m": 30, "y": 365}[match.group(2)]
+    return amount * unit_days * 86400 * 1000
+
+
+# -- corpus seeding ---------------------------------------------------------------
+
+
+def _load_rule_patterns(filter_file: Path) -> List[Tuple[List[str], List[str]]]:
+    if not filter_file.exists():
+        return []
+    loaded = json.loads(filter_file.read_text(encoding="utf-8"))
+    patterns = []
+    for rule in loaded.get("filters", []):
+        if not isinstance(rule, dict) or not rule.get("enabled"):
+            continue
+        froms = [p for p in rule.get("from_patterns") or [] if isinstance(p, str) and p.strip()]
+        subjects = [p for p in rule.get("subject_patterns") or [] if isinstance(p, str) and p.strip()]
+        if froms or subjects:
+            patterns.append((froms, subjects))
+    return patterns
+
+
+def seed_synthetic(
+    mailbox: FakeMailbox,
+    count: int,
+    seed: int = 7,
+    filter_file: Path = CONFIG_DIR / "filters.v3.json",
+    max_age_days: int = 60,
+    legacy_share: float = 0.1,
+) -> None:
+    rng = random.Random(seed)
+    rule_patterns = _load_rule_patterns(filter_file)
+    legacy_ids = [mailbox.ensure_label(name) for name in SYNTHETIC_LEGACY_LABELS]
+    now_ms = int(time.time() * 1000)
+    for idx in range(count):
+        if rule_patterns and rng.random() < 0.8:
+            froms, subjects = rng.choice(rule_patterns)
+            sender_pattern = rng.choice(froms) if froms else rng.choice(SYNTHETIC_NOISE_SENDERS)
+            sender = sender_pattern if "@" in sender_pattern else f"news@{sender_pattern.lstrip('@')}"
+            subject = f"{rng.choice(subjects)} #{idx}" if subjects else f"update #{idx}"
+        else:
+            sender = rng.choice(SYNTHETIC_NOISE_SENDERS)
+            subject = f"{rng.choice(SYNTHETIC_NOISE_SUBJECTS)} #{idx}"
+        labels = ["INBOX"]
+        if rng.random() < 0.5:
+            labels.append("UNREAD")
+        if rng.random() < legacy_share:
+            labels.append(rng.choice(legacy_ids))
+        age_ms = rng.randint(0, max_age_days * 86400) * 1000
+        mailbox.add_message(
+            sender=f"Sender {idx % 97} <{sender}>" if rng.random() < 0.5 else sender,
+            subject=subject,
+            label_ids=labels,
+            internal_date_ms=now_ms - age_ms,
+            message_id=f"{idx:016x}",
+        )
+
+
+def seed_from_json(mailbox: FakeMailbox, corpus_file: Path) -> None:
+    loaded = json.loads(corpus_file.read_text(encoding="utf-8"))
+    items = loaded.get("messages", []) if isinstance(loaded, dict) else loaded
+    now_ms = int(time.time() * 1000)
+    for idx, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        label_ids = [
+            name if name in mailbox.labels else mailbox.ensure_label(name)
+            for name in item.get("labelIds") or item.get("labels") or ["INBOX"]
+        ]
+        internal_date = item.get("internalDate")
+        if internal_date is None:
+            internal_date = now_ms - int(item.get("age_days", idx % 30)) * 86400 * 1000
+        mailbox.add_message(
+            sender=str(item.get("from", "")),
+            subject=str(item.get("subject", "")),
+            label_ids=label_ids,
+            internal_date_ms=int(internal_date),
+            message_id=str(item["id"]) if item.get("id") else None,
+            thread_id=str(item["threadId"]) if item.get("threadId") else None,
+        )
+
+
+# -- fault and quota model ----------------------------------------------------------
+
+
+class FaultModel:
+    def __init__(
+        self,
+        latency_ms: Optional[Dict[str, float]] = None,
+        error_rates: Optional[Dict[str, Dict[int, float]]] = None,
+        quota_units_per_second: float = 0.0,
+        seed: int = 7,
+    ):
+        self.latency_ms = dict(latency_ms or {})
+        self.error_rates = dict(error_rates or {})
+        self.quota_units_per_second = quota_units_per_second
+        self.rng = random.Random(seed)
+        self.stats: Counter = Counter()
+        self._quota_window: Deque[Tuple[float, int]] = deque()
+        self._quota_used = 0
+        self.lock = threading.Lock()
+
+    def latency_for(self, endpoint: str) -> float:
+        return self.latency_ms.get(endpoint, self.latency_ms.get("default", 0.0)) / 1000.0
+
+    def charge(self, endpoint: str, method: str) -> None:
+        _, units = GMAIL_QUOTA_UNIT_COSTS.get(endpoint, ("read", 5))
+        with self.lock:
+            self.stats[f"calls:{endpoint}"] += 1
+            self.stats[f"units:{endpoint}"] += units
+            self.stats["units_total"] += units
+            for status, rate in sorted({**self.error_rates.get("*", {}), **self.error_rates.get(endpoint, {})}.items()):
+                if self.rng.random() < rate:
+                    self.stats[f"injected:{status}"] += 1
+                    raise _FakeError(status, "backendError" if status >= 500 else "rateLimitExceeded", "injected failure")
+            if self.quota_units_per_second > 0:
+                now = time.monotonic()
+                while self._quota_window and self._quota_window[0][0] <= now - 1.0:
+                    self._quota_used -= self._quota_window.popleft()[1]
+                if self._quota_used + units > self.quota_units_per_second:
+                    self.stats["quota_rejections"] += 1
+                    raise _FakeError(429, "rateLimitExceeded", "User-rate limit exceeded.", retry_after=1)
+                self._quota_window.append((now, units))
+                self._quota_used += units
+
+    def record_status(self, endpoint: str, status: int) -> None:
+        with self.lock:
+            self.stats[f"status:{status}"] += 1
+            if status >= 400:
+                self.stats[f"errors:{endpoint}"] += 1
+
+
+# -- HTTP surface ----------------------------------------------------------------------
+
+
+class FakeGmailApp:
+    def __init__(self, mailbox: FakeMailbox, faults: FaultModel, enable_gzip: bool = True):
+        self.mailbox = mailbox
+        self.faults = faults
+        self.enable_gzip = enable_gzip
+
+    def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Dict[str, Any], Dict[str, str]]:
+        parsed = urlparse(target)
+        params = parse_qs(parsed.query)
+        path = unquote(parsed.path)
+        if not path.startswith(API_PREFIX):
+            return 404, _FakeError(404, "notFound", f"unknown path {path}").payload(), {}
+        sub_path = path[len(API_PREFIX) :] or "/"
+        endpoint = _gmail_endpoint_name(method, sub_path)
+        try:
+            self.faults.charge(endpoint, method)
+            delay = self.faults.latency_for(endpoint)
+            if delay > 0:
+                time.sleep(delay)
+            payload = self._route(method, sub_path, params, body)
+            if "fields" in params:
+                payload = _apply_fields(payload, _parse_fields(params["fields"][0]))
+            self.faults.record_status(endpoint, 200)
+            return 200, payload, {}
+        except _FakeError as exc:
+            self.faults.record_status(endpoint, exc.status)
+            headers = {"Retry-After": str(int(exc.retry_after))} if exc.retry_after is not None else {}
+            return exc.status, exc.payload(), headers
+
+    def _route(self, method: str, path: str, params: Dict[str, List[str]], body: bytes) -> Dict[str, Any]:
+        mb = self.mailbox
+        parts = [p for p in path.split("/") if p]
+        data = json.loads(body.decode("utf-8")) if body else {}
+        if parts == ["profile"]:
+            return {"emailAddress": mb.owner, "messagesTotal": len(mb.messages), "historyId": str(mb.history_id)}
+        if parts == ["labels"]:
+            if method == "POST":
+                name = data.get("name")
+                if not isinstance(name, str) or not name:
+                    raise _FakeError(400, "invalidArgument", "Invalid label name")
+                return mb.create_label(name)
+            return {"labels": list(mb.labels.values())}
+        if parts == ["history"]:
+            start = params.get("startHistoryId", [""])[0]
+            if not start.isdigit():
+                raise _FakeError(400, "invalidArgument", "startHistoryId is required")
+            records = mb.list_history(
+                int(start), params.get("historyTypes", []), params.get("labelId", [None])[0]
+            )
+            offset = int(params.get("pageToken", ["0"])[0] or 0)
+            page_size = max(1, min(500, int(params.get("maxResults", ["100"])[0])))
+            page = records[offset : offset + page_size]
+            resp: Dict[str, Any] = {"historyId": str(mb.history_id)}
+            if page:
+                resp["history"] = page
+            if offset + page_size < len(records):
+                resp["nextPageToken"] = str(offset + page_size)
+            return resp
+        if parts and parts[0] == "messages":
+            if len(parts) == 1 and method == "GET":
+                matched = mb.search(params.get("q", [""])[0])
+                offset = int(params.get("pageToken", ["0"])[0] or 0)
+                page_size = max(1, min(500, int(params.get("maxResults", ["100"])[0])))
+                page = matched[offset : offset + page_size]
+                resp = {"resultSizeEstimate": len(matched)}
+                if page:
+                    resp["messages"] = [{"id": m["id"], "threadId": m["threadId"]} for m in page]
+                if offset + page_size < len(matched):
+                    resp["nextPageToken"] = str(offset + page_size)
+                return resp
+            if parts[1:] == ["batchModify"] and method == "POST":
+                ids = data.get("ids") or []
+                if len(ids) > 1000:
+                    raise _FakeError(400, "invalidArgument", "Too many ids")
+                with mb.lock:
+                    for mid in ids:
+                        if mid in mb.messages:
+                            mb.modify(mid, data.get("addLabelIds") or [], data.get("removeLabelIds") or [])
+                return {}
+            if len(parts) == 2 and method == "GET":
+                fmt = params.get("format", ["full"])[0]
+                return mb.render_message(mb.get(parts[1]), fmt, params.get("metadataHeaders", []))
+            if len(parts) == 3 and method == "POST":
+                if parts[2] == "modify":
+                    message = mb.modify(parts[1], data.get("addLabelIds") or [], data.get("removeLabelIds") or [])
+                elif parts[2] == "trash":
+                    message = mb.trash(parts[1])
+                elif parts[2] == "untrash":
+                    message = mb.untrash(parts[1])
+                else:
+                    raise _FakeError(404, "notFound", f"unknown action {parts[2]}")
+                return {"id": message["id"], "threadId": message["threadId"], "labelIds": sorted(message["labelIds"])}
+        raise _FakeError(404, "notFound", f"unsupported {method} {path}")
+
+    def dispatch_batch(self, content_type: str, body: bytes) -> Tuple[int, bytes, str]:
+        match = re.search(r'boundary="?([^";]+)"?', content_type or "")
+        if not match:
+            return 400, b"missing boundary", "text/plain"
+        delimiter = b"--" + match.group(1).encode("ascii")
+        out_boundary = f"batch_{secrets.token_hex(8)}"
+        lines: List[str] = []
+        chunks = body.replace(b"\r\n", b"\n").split(delimiter)[1:]
+        if len(chunks) - 1 > 100:
+            return 400, b"too many batch parts", "text/plain"
+        for chunk in chunks:
+            if chunk.startswith(b"--"):
+                break
+            outer, _, inner = chunk.strip(b"\n").partition(b"\n\n")
+            content_id = re.search(rb"content-id:\s*<([^>]+)>", outer, re.IGNORECASE)
+            request_line, _, rest = inner.partition(b"\n")
+            _, _, inner_body = rest.partition(b"\n\n")
+            pieces = request_line.decode("utf-8").split()
+            method, target = (pieces[0], pieces[1]) if len(pieces) >= 2 else ("GET", "/")
+            status, payload, _ = self.dispatch(method, target, inner_body.strip())
+            lines.extend(
+                [
+                    f"--{out_boundary}",
+                    "Content-Type: application/http",
+                    f"Content-ID: <response-{content_id.group(1).decode() if content_id else ''}>",
+                    "",
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}",
+                    "Content-Type: application/json; charset=UTF-8",
+                    "",
+                    json.dumps(payload, ensure_ascii=False),
+                    "",
+                ]
+            )
+        lines.append(f"--{out_boundary}--")
+        return 200, "\r\n".join(lines).encode("utf-8"), f"multipart/mixed; boundary={out_boundary}"
+
+    def admin(self, method: str, path: str, body: bytes) -> Dict[str, Any]:
+        if path == "/_fake/stats":
+            with self.faults.lock:
+                stats = dict(self.faults.stats)
+            return {"stats": stats, "messages": len(self.mailbox.messages), "history_id": self.mailbox.history_id}
+        if path == "/_fake/reset-stats" and method == "POST":
+            with self.faults.lock:
+                self.faults.stats.clear()
+            return {"ok": True}
+        if path == "/_fake/messages" and method == "POST":
+            data = json.loads(body.decode("utf-8")) if body else {}
+            items = data.get("messages", []) if isinstance(data, dict) else []
+            now_ms = int(time.time() * 1000)
+            added = [
+                self.mailbox.add_message(
+                    sender=str(item.get("from", "")),
+                    subject=str(item.get("subject", "")),
+                    label_ids=[self.mailbox.ensure_label(n) if n not in self.mailbox.labels else n for n in item.get("labelIds", ["INBOX"])],
+                    internal_date_ms=int(item.get("internalDate", now_ms)),
+                    message_id=item.get("id"),
+                )["id"]
+                for item in items
+                if isinstance(item, dict)
+            ]
+            return {"added": added}
+        raise _FakeError(404, "notFound", f"unknown admin path {path}")
+
+
+def _make_handler(app: FakeGmailApp):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, delayed ACKs add ~40ms per call.
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+        def _read_body(self) -> bytes:
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _send(self, status: int, raw: bytes, content_type: str, extra: Optional[Dict[str, str]] = None) -> None:
+            if app.enable_gzip and "gzip" in (self.headers.get("Accept-Encoding") or "") and len(raw) > 256:
+                raw = gzip.compress(raw, compresslevel=5)
+                extra = dict(extra or {}, **{"Content-Encoding": "gzip"})
+            with app.faults.lock:
+                app.faults.stats["bytes_out"] += len(raw)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(raw)))
+            for key, value in (extra or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def _handle(self, method: str) -> None:
+            body = self._read_body()
+            with app.faults.lock:
+                app.faults.stats["http_requests"] += 1
+                app.faults.stats["bytes_in"] += len(body)
+            path = urlparse(self.path).path
+            if path.startswith("/_fake/"):
+                try:
+                    payload = app.admin(method, path, body)
+                    self._send(200, json.dumps(payload).encode("utf-8"), "application/json")
+                except _FakeError as exc:
+                    self._send(exc.status, json.dumps(exc.payload()).encode("utf-8"), "application/json")
+                return
+            if not (self.headers.get("Authorization") or "").startswith("Bearer "):
+                err = _FakeError(401, "authError", "Request is missing required authentication credential.")
+                self._send(401, json.dumps(err.payload()).encode("utf-8"), "application/json")
+                return
+            if path == BATCH_PATH and method == "POST":
+                status, raw, content_type = app.dispatch_batch(self.headers.get("Content-Type", ""), body)
+                self._send(status, raw, content_type)
+                return
+            status, payload, headers = app.dispatch(method, self.path, body)
+            self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=UTF-8", headers)
+
+        def do_GET(self) -> None:
+            self._handle("GET")
+
+        def do_POST(self) -> None:
+            self._handle("POST")
+
+    return Handler
+
+
+class FakeGmailServer:
+    def __init__(self, app: FakeGmailApp, host: str = "127.0.0.1", port: int = 0):
+        self.app = app
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(app))
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def api_base(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self) -> "FakeGmailServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-gmail", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeGmailServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def _parse_latency_args(values: List[str]) -> Dict[str, float]:
+    latency: Dict[str, float] = {}
+    for raw in values:
+        key, sep, value = raw.partition("=")
+        if not sep:
+            key, value = "default", raw
+        latency[key.strip()] = float(value)
+    return latency
+
+
+def _parse_error_args(values: List[str]) -> Dict[str, Dict[int, float]]:
+    # "429=0.02" applies to every endpoint, "messages.get:503=0.05" to one.
+    rates: Dict[str, Dict[int, float]] = {}
+    for raw in values:
+        target, sep, rate = raw.partition("=")
+        if not sep:
+            raise ValueError(f"invalid --error-rate value: {raw}")
+        endpoint, _, status = target.rpartition(":")
+        rates.setdefault(endpoint or "*", {})[int(status)] = float(rate)
+    return rates
+
+
+def build_server(
+    messages: int = 1000,
+    corpus: Optional[Path] = None,
+    seed: int = 7,
+    latency_ms: Optional[Dict[str, float]] = None,
+    error_rates: Optional[Dict[str, Dict[int, float]]] = None,
+    quota_units_per_second: float = 0.0,
+    owner: str = "owner@example.com",
+    host: str = "127.0.0.1",
+    port: int = 0,
+    enable_gzip: bool = True,
+) -> FakeGmailServer:
+    mailbox = FakeMailbox(owner=owner)
+    if corpus is not None:
+        seed_from_json(mailbox, corpus)
+    else:
+        seed_synthetic(mailbox, messages, seed=seed)
+    faults = FaultModel(
+        latency_ms=latency_ms,
+        error_rates=error_rates,
+        quota_units_per_second=quota_units_per_second,
+        seed=seed,
+    )
+    return FakeGmailServer(FakeGmailApp(mailbox, faults, enable_gzip=enable_gzip), host=host, port=port)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="local Gmail API stand-in for offline runs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--messages", type=int, default=1000, help="synthetic corpus size")
+    parser.add_argument("--corpus", type=str, default="", help="JSON corpus file (list or {messages: [...]})")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--owner", default="owner@example.com")
+    parser.add_argument(
+        "--latency-ms",
+        action="append",
+        default=[],
+        help="per-endpoint latency, e.g. 20 or messages.get=35 (repeatable)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        action="append",
+        default=[],
+        help="inject failures, e.g. 429=0.01 or messages.batchModify:503=0.05 (repeatable)",
+    )
+    parser.add_argument("--quota-units-per-second", type=float, default=0.0, help="0 disables quota enforcement")
+    parser.add_argument("--no-gzip", action="store_true")
+    args = parser.parse_args()
+
+    server = build_server(
+        messages=args.messages,
+        corpus=Path(args.corpus) if args.corpus else None,
+        seed=args.seed,
+        latency_ms=_parse_latency_args(args.latency_ms),
+        error_rates=_parse_error_args(args.error_rate),
+        quota_units_per_second=args.quota_units_per_second,
+        owner=args.owner,
+        host=args.host,
+        port=args.port,
+        enable_gzip=not args.no_gzip,
+    )
+    print(json.dumps({"api_base": server.api_base, "messages": len(server.app.mailbox.messages)}), flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())